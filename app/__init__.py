@@ -43,6 +43,19 @@ def _init_services(app):
     from .services.game_registry import GameRegistry
     from .services.matchmaking_service import MatchmakingService
     from .game_core.ai_controller import AIController
+    from .game_core import configure_turns_cache, configure_move_tree_payload
+    from .game_core.move_offload import configure_move_offload, start_hub_stall_monitor
+    from .game_core.eval_cache import configure_eval_cache
+    from .game_core.opening_book import load_opening_book
+    from .game_core.bearoff_db import load_bearoff_db
+
+    configure_turns_cache(app.config['TURNS_CACHE_SIZE'], app.config['TURNS_CACHE_TTL'])
+    configure_move_tree_payload(app.config['SEND_MOVE_TREE'])
+    configure_move_offload(app.config['MOVEGEN_OFFLOAD_MODE'], app.config['MOVEGEN_OFFLOAD_COST'])
+    start_hub_stall_monitor(app.config['HUB_STALL_MONITOR_INTERVAL'], app.config['HUB_STALL_WARN_MS'])
+    configure_eval_cache(app.config['GNUBG_EVAL_CACHE_FILE'], app.config['GNUBG_EVAL_CACHE_SIZE'])
+    load_opening_book(app.config['OPENING_BOOK_FILE'])
+    load_bearoff_db(app.config['BEAROFF_DB_FILE'])
 
     ai_controller = AIController(app=app)
     matchmaker = MatchmakingService(log_event_func=log_event)
@@ -133,6 +146,10 @@ def create_app():
     app.config['DB_FILE'] = os.path.join(
         app.instance_path, app.config['DB_FILE']
     )
+    if app.config.get('GNUBG_EVAL_CACHE_FILE'):
+        app.config['GNUBG_EVAL_CACHE_FILE'] = os.path.join(
+            app.instance_path, app.config['GNUBG_EVAL_CACHE_FILE']
+        )
     
     # 2. Настройка логирования
     _configure_logging(app)
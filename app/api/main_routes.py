@@ -4,6 +4,8 @@ from flask import (
     current_app, 
     jsonify
 )
+from ..extensions import limiter
+from ..game_core.move_offload import get_offload_stats
 
 # Создаем новый Blueprint
 bp = Blueprint('main', __name__)
@@ -34,4 +36,13 @@ def download_apk():
         current_app.logger.error(
             f"Неизвестная ошибка при попытке отправить файл: {e}", exc_info=True
         )
-        return jsonify({"error": "An internal server error occurred"}), 500
\ No newline at end of file
+        return jsonify({"error": "An internal server error occurred"}), 500
+
+@bp.route('/status', methods=['GET'])
+@limiter.limit("20 per minute")
+def handle_status():
+    """
+    Метрики генерации ходов: сколько переборов ушло из хаба eventlet,
+    сколько посчитано на месте и задержки хаба (hub stall, сек.).
+    """
+    return jsonify({"status": "success", "movegen": get_offload_stats()}), 200
@@ -23,4 +23,37 @@ class Config:
     # --- Награды и штрафы ---
     ELO_REWARD_WIN = 1
     MONEY_REWARD_WIN = 10
-    ELO_PENALTY_LOSS = -1
\ No newline at end of file
+    ELO_PENALTY_LOSS = -1
+
+    # --- GnuBG (пул долгоживущих процессов) ---
+    GNUBG_POOL_SIZE = 2 # 0 - отключить пул (процесс на каждый ход)
+    GNUBG_REQUEST_TIMEOUT = 15.0 # сек. на один запрос к gnubg
+    GNUBG_HEALTHCHECK_INTERVAL = 60.0 # сек. простоя, после которых процесс проверяется перед выдачей
+
+    # --- Бот ---
+    BOT_THINK_TIME_MIN = 0.5 # сек.; "раздумья" - минимальная задержка ответа бота, расчет идет параллельно
+    BOT_THINK_TIME_MAX = 6.0 # сек.
+
+    # --- Кэш решений gnubg (Position ID + Match ID + уровень бота) ---
+    GNUBG_EVAL_CACHE_FILE = 'gnubg_eval_cache.db' # SQLite в папке instance, общий для процессов; None - только память
+    GNUBG_EVAL_CACHE_SIZE = 20000 # записей в памяти процесса
+
+    # --- Дебютная книга бота (python -m app.game_core.opening_book) ---
+    OPENING_BOOK_FILE = os.path.join(BASE_DIR, 'app', 'game_core', 'data', 'opening_book.bin') # None - без книги
+
+    # --- База выброса (python -m app.game_core.bearoff_db) ---
+    BEAROFF_DB_FILE = os.path.join(BASE_DIR, 'app', 'game_core', 'data', 'bearoff_os.bin') # None - выброс считает gnubg
+
+    # --- Кэш генерации ходов (позиция + кубики + сторона) ---
+    TURNS_CACHE_SIZE = 50000 # записей; 0 - отключить кэш
+    TURNS_CACHE_TTL = 3600.0 # сек. жизни записи
+    PREFETCH_ALL_ROLLS = False # True - пока бот ходит, считать ходы игрока для всех 21 броска
+
+    # --- Формат доступных ходов в payload ---
+    SEND_MOVE_TREE = False # True - клиент получает компактное дерево ходов вместо possible_turns
+
+    # --- Генерация ходов вне хаба eventlet ---
+    MOVEGEN_OFFLOAD_MODE = 'inline' # 'inline' - в обработчике; 'thread' - дорогие позиции в системном потоке (eventlet.tpool)
+    MOVEGEN_OFFLOAD_COST = 4096 # оценка перебора (точки с фишками ** число кубиков), начиная с которой генерация уходит из хаба
+    HUB_STALL_MONITOR_INTERVAL = 0.5 # сек.; 0 - не следить за задержками хаба
+    HUB_STALL_WARN_MS = 100.0 # задержки хаба дольше этого пишутся в лог
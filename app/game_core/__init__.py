@@ -6,13 +6,41 @@ from .constants import (
 )
 
 from .board_state import (
+    Board,
+    zobrist_hash,
     create_initial_board_state,
     apply_move_to_board,
     undo_move_on_board
 )
 
 from .move_generator import (
-    get_all_possible_turns
+    get_all_possible_turns,
+    get_packed_turns,
+    has_legal_move,
+    get_move_tree,
+    get_turns_for_all_rolls,
+    configure_turns_cache,
+    get_turns_cache_stats
+)
+
+from .move_codec import (
+    pack_move,
+    unpack_move,
+    is_valid_step,
+    sequence_to_dicts,
+    sequence_from_dicts
+)
+
+from .canonical import (
+    canonical_position_key,
+    mirror_board,
+    mirror_move
+)
+
+from .move_tree import (
+    MoveTree,
+    configure_move_tree_payload,
+    turns_payload
 )
 
 from .move_validator import (
@@ -5,13 +5,63 @@ import sys
 import threading
 import logging
 import time
+import heapq
 import random 
+import itertools
 from concurrent.futures import ThreadPoolExecutor
 from . import gnubg_service
+from . import gnubg_interface
+from .move_generator import get_turns_for_all_rolls, has_legal_move
+from .opening_book import lookup_opening_move
+from .evaluator import ENGINE_LINEAR, choose_linear_turn
 
 # Настраиваем логгер для этого модуля
 logger = logging.getLogger(__name__)
 
+DEFAULT_THINK_TIME_MIN = 0.5 # сек.
+DEFAULT_THINK_TIME_MAX = 6.0 # сек.
+
+
+class DelayedCallScheduler:
+    """
+    Отложенные вызовы на одном фоновом потоке: очередь (heapq) по времени
+    срабатывания. Ожидание не занимает воркеры пула - спит только этот поток,
+    и он просыпается к ближайшему сроку.
+    """
+
+    def __init__(self, name: str = "DelayedCallScheduler"):
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay: float, fn, *args):
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), fn, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    remaining = self._heap[0][0] - time.monotonic()
+                    if remaining <= 0:
+                        _, _, fn, args = heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(remaining)
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"[{self.name}] Ошибка отложенного вызова: {e}", exc_info=True)
+
+
 class AIController:
 
     def __init__(self, app):
@@ -23,13 +73,25 @@ class AIController:
         self.app = app
         cpu_count = os.cpu_count() or 1
         self.executor = ThreadPoolExecutor(max_workers=cpu_count)
+
+        gnubg_interface.configure_pool(
+            size=app.config.get('GNUBG_POOL_SIZE', gnubg_interface.DEFAULT_POOL_SIZE),
+            request_timeout=app.config.get('GNUBG_REQUEST_TIMEOUT', gnubg_interface.DEFAULT_REQUEST_TIMEOUT),
+            healthcheck_interval=app.config.get('GNUBG_HEALTHCHECK_INTERVAL', gnubg_interface.DEFAULT_HEALTHCHECK_INTERVAL)
+        )
+        self.prefetch_all_rolls = app.config.get('PREFETCH_ALL_ROLLS', False)
+        self.think_time_min = app.config.get('BOT_THINK_TIME_MIN', DEFAULT_THINK_TIME_MIN)
+        self.think_time_max = app.config.get('BOT_THINK_TIME_MAX', DEFAULT_THINK_TIME_MAX)
+        # "Раздумья" бота досиживаются здесь, а не в воркере пула
+        self.scheduler = DelayedCallScheduler("BotThinkScheduler")
         
         logger.info(f"Инициализирован. Использует 'gnubg_service'. Пул потоков: {cpu_count} worker(ов).")
 
-    def get_bot_turn_async(self, board, dice, bot_sign, game_session_instance):
+    def get_bot_turn_async(self, board, dice, bot_sign, game_session_instance, bot_profile=None):
         """
         Публичный метод для асинхронного запроса хода бота.
         Запускает _execute_calculation_and_callback в фоновом потоке.
+        bot_profile - уровень и движок бота (VALID_BOTS), None - gnubg.
         """
         if not dice:
             logger.debug("get_bot_turn_async: Нет кубиков, отправляем задачу на пропуск хода.")
@@ -39,42 +101,97 @@ class AIController:
             board, 
             dice, 
             bot_sign, 
-            game_session_instance
+            game_session_instance,
+            bot_profile or {},
+            time.monotonic()
+        )
+
+    def prefetch_turns_async(self, board, player_sign):
+        """
+        Заранее считает ходы игрока для всех 21 броска, пока он еще не бросил
+        кубики. Результат оседает в кэше деревьев ходов, и расчет после
+        настоящего броска становится попаданием в кэш.
+        """
+        if not self.prefetch_all_rolls:
+            return
+        self.executor.submit(self._prefetch_turns, board, player_sign)
+
+    def _prefetch_turns(self, board, player_sign):
+        try:
+            get_turns_for_all_rolls(board, player_sign)
+        except Exception as e:
+            logger.error(f"Ошибка предрасчета ходов для всех бросков: {e}", exc_info=True)
+
+    def _choose_turn(self, board, dice, bot_sign, bot_profile):
+        """Ход бота движком из его профиля."""
+        tid = threading.current_thread().name
+
+        if bot_profile.get('engine') == ENGINE_LINEAR:
+            logger.debug(f"({tid}) Ход считает линейный оценщик (уровень {bot_profile.get('level')}).")
+            return choose_linear_turn(board, dice, bot_sign, noise=bot_profile.get('noise', 0.0))
+
+        # Первые ходы партии - из дебютной книги, без запроса к gnubg
+        bot_turn_dicts = lookup_opening_move(board, dice, bot_sign)
+        if bot_turn_dicts is not None:
+            logger.debug(f"({tid}) Ход взят из дебютной книги.")
+            return bot_turn_dicts
+
+        logger.debug(f"({tid}) ВЫЗОВ gnubg_service.get_gnubg_turn...")
+        return gnubg_service.get_gnubg_turn(
+            board, dice, bot_sign,
+            bot_profile.get('level', gnubg_service.DEFAULT_BOT_LEVEL)
         )
 
-    def _execute_calculation_and_callback(self, board, dice, bot_sign, game_session_instance):
+    def _execute_calculation_and_callback(self, board, dice, bot_sign, game_session_instance, bot_profile, requested_at):
         """        
         Выполняет основную работу: расчет хода и вызов callback.
         Этот метод выполняется в фоновом потоке.
+
+        Время "раздумий" - минимальная общая задержка ответа, считая от запроса:
+        ход считается сразу, а результат отдается, когда прошло и время
+        расчета, и время раздумий. Остаток задержки ждет планировщик
+        (он же потом вызывает callback), воркер пула освобождается сразу
+        после расчета.
         """
         tid = threading.current_thread().name
         bot_turn_dicts = None
 
         if not dice:
             logger.debug(f"({tid}) Нет кубиков, пропускаем расчет. Готовим callback(None)...")
+        elif not has_legal_move(board, dice, bot_sign):
+            # Ходить нечем: ни "раздумий", ни запроса к gnubg
+            logger.debug(f"({tid}) Нет легальных ходов с {dice}, пропускаем расчет. Готовим callback(None)...")
         else:
+            thinking_time = random.uniform(self.think_time_min, self.think_time_max)
             try:
-                min_think = 0.5
-                max_think = 6.0
-                thinking_time = random.uniform(min_think, max_think)
-                
-                logger.info(f"({tid}) ИИ 'думает' {thinking_time:.2f} сек... (Задержка до вызова GnuBG)")
-                time.sleep(thinking_time)
-
-                logger.debug(f"({tid}) ВЫЗОВ gnubg_service.get_gnubg_turn...")
-                
-                bot_turn_dicts = gnubg_service.get_gnubg_turn(board, dice, bot_sign)
+                bot_turn_dicts = self._choose_turn(board, dice, bot_sign, bot_profile)
                 
-                logger.debug(f"({tid}) ВЕРНУЛСЯ из gnubg_service.")
+                logger.debug(f"({tid}) ВЕРНУЛСЯ из расчета хода.")
                 logger.debug(f"({tid}) ...Результат хода: {bot_turn_dicts}")
                 logger.debug(f"({tid}) ...Кубики: {dice}, Знак: {bot_sign}")
 
             except Exception as e:
                 logger.critical(
-                    f"({tid}) КРИТИЧЕСКАЯ ОШИБКА в gnubg_service.get_gnubg_turn: {e}",
+                    f"({tid}) КРИТИЧЕСКАЯ ОШИБКА при расчете хода бота: {e}",
                     exc_info=True
                 )
-        
+
+            elapsed = time.monotonic() - requested_at
+            remaining = thinking_time - elapsed
+            if remaining > 0:
+                logger.info(f"({tid}) ИИ 'думает' {thinking_time:.2f} сек. (расчет {elapsed:.2f} сек., ответ через {remaining:.2f} сек.)")
+                self.scheduler.call_later(
+                    remaining,
+                    self._deliver_bot_turn, bot_turn_dicts, dice, bot_sign, game_session_instance
+                )
+                return
+            logger.info(f"({tid}) Расчет хода ({elapsed:.2f} сек.) дольше времени 'раздумий' ({thinking_time:.2f} сек.), ответ сразу.")
+
+        self._deliver_bot_turn(bot_turn_dicts, dice, bot_sign, game_session_instance)
+
+    def _deliver_bot_turn(self, bot_turn_dicts, dice, bot_sign, game_session_instance):
+        """Передает ход бота в игровую сессию (callback on_bot_turn_calculated)."""
+        tid = threading.current_thread().name
         try:
             with self.app.app_context():
                 logger.debug(f"({tid}) --> СЕЙЧАС БУДЕТ ВЫЗВАН on_bot_turn_calculated (в app context)...")
@@ -0,0 +1,221 @@
+# app/game_core/batch_moves.py
+"""
+Векторизованная (NumPy) генерация ходов сразу для множества досок.
+
+Нужна для симуляций, аналитики и self-play ботов, где доски считаются
+тысячами. Доски - массив (N, 28) int8 в обычном формате индексов.
+Внутри все приводится к канонической системе (ходят белые, см. canonical),
+поэтому правила записаны один раз.
+
+batch_turn_arrays отдает результат массивами (самый быстрый путь),
+batch_possible_turns - в формате get_all_possible_turns. Результат
+совпадает с get_all_possible_turns по множеству пар "первый шаг +
+итоговая позиция" (tests/test_batch_moves.py).
+"""
+
+from typing import List
+
+import numpy as np
+
+from . import constants as c
+from .board_state import _ZOBRIST, BOARD_SIZE
+from .canonical import MIRROR
+
+_MIRROR = np.array(MIRROR, dtype=np.intp)
+# Столбцы источников: точки 1..24 и бар белых (25)
+_FROM_POINTS = np.arange(c.POINT_1, c.BAR_WHITE + 1)
+# Таблица Zobrist из board_state: _ZOBRIST_NP[i, v + 15], для дедупликации состояний
+_ZOBRIST_NP = np.array([[row[v] for v in range(-15, 16)] for row in _ZOBRIST], dtype=np.uint64)
+_CELLS = np.arange(BOARD_SIZE)
+_ORIGIN_MIX = np.uint64(0x9E3779B97F4A7C15)
+_STEP_MIX = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+def to_canonical(boards, player_sign) -> np.ndarray:
+    """(N, 28) доски в канонической системе (ходят белые)."""
+    boards = np.asarray(boards, dtype=np.int8)
+    if player_sign == c.PLAYER_WHITE:
+        return boards
+    return -boards[:, _MIRROR]
+
+
+def _single_die_moves(boards: np.ndarray, die: int):
+    """
+    Одиночные ходы кубиком die для всех канонических досок.
+    Возвращает (mask, rows, froms, tos, new_boards):
+    mask (N, 25) - легальные источники (столбец j - точка j + 1),
+    остальные массивы - по одной строке на каждый найденный ход.
+    """
+    tos = _FROM_POINTS - die
+    own = boards[:, c.POINT_1:c.BAR_WHITE + 1] > 0
+
+    # Обычный ход (в том числе с бара): точка назначения не закрыта соперником
+    dest = boards[:, np.clip(tos, c.POINT_1, c.POINT_24)] >= -1
+    mask = own & (tos >= c.POINT_1) & dest
+
+    # Выброс: все фишки в доме, ход точный или с самой дальней фишки
+    outside = boards[:, c.POINT_1 + 6:c.BAR_WHITE + 1] > 0
+    all_home = ~outside.any(axis=1)
+    occupied = boards[:, c.POINT_1:c.POINT_24 + 1] > 0
+    furthest = np.where(occupied.any(axis=1), c.POINT_24 - np.argmax(occupied[:, ::-1], axis=1), 0)
+    bear_off = (tos < c.POINT_1) & ((_FROM_POINTS == die) | (_FROM_POINTS == furthest[:, None]))
+    mask |= own & all_home[:, None] & bear_off
+
+    # С фишкой на баре можно ходить только с бара
+    on_bar = boards[:, c.BAR_WHITE] > 0
+    mask[on_bar, :-1] = False
+
+    rows, cols = np.nonzero(mask)
+    froms = _FROM_POINTS[cols]
+    tos = np.maximum(froms - die, c.HOME_WHITE)
+
+    new_boards = boards[rows]
+    index = np.arange(len(rows))
+    new_boards[index, froms] -= 1
+    was_blot = (tos >= c.POINT_1) & (new_boards[index, tos] == -1)
+    new_boards[index, tos] += 1 + was_blot
+    new_boards[index[was_blot], c.BAR_BLACK] -= 1
+
+    return mask, rows, froms, tos, new_boards
+
+
+def batch_single_moves(boards, die: int, player_sign):
+    """
+    Одиночные ходы одним кубиком для (N, 28) досок стороны player_sign.
+    Возвращает (rows, froms, tos, new_boards) в системе индексов игрока:
+    rows - номер исходной доски для каждого хода.
+    """
+    _, rows, froms, tos, new_boards = _single_die_moves(to_canonical(boards, player_sign), die)
+    if player_sign == c.PLAYER_WHITE:
+        return rows, froms, tos, new_boards
+    return rows, _MIRROR[froms], _MIRROR[tos], -new_boards[:, _MIRROR]
+
+
+def _board_keys(boards: np.ndarray) -> np.ndarray:
+    """Zobrist-хэши (uint64) для (K, 28) досок."""
+    return np.bitwise_xor.reduce(_ZOBRIST_NP[_CELLS, boards.astype(np.intp) + 15], axis=1)
+
+
+def _state_keys(origins, first_steps, boards) -> np.ndarray:
+    """Хэш (исходная доска, первый шаг, доска) для дедупликации."""
+    steps = first_steps[:, 0].astype(np.uint64) * np.uint64(32) + first_steps[:, 1].astype(np.uint64)
+    keys = _board_keys(boards)
+    keys ^= origins.astype(np.uint64) * _ORIGIN_MIX
+    keys ^= (steps + np.uint64(1)) * _STEP_MIX
+    return keys
+
+
+def _dedup(origins, paths, boards):
+    """
+    Убирает состояния с одинаковыми (исходная доска, первый шаг, доска).
+    Ключ - 64-битный хэш, как и в таблице транспозиций _generate_all_possible_turns.
+    """
+    if len(origins) == 0:
+        return origins, paths, boards
+    _, index = np.unique(_state_keys(origins, paths[:, 0, :], boards), return_index=True)
+    index.sort()
+    return origins[index], paths[index], boards[index]
+
+
+def _expand_order(boards: np.ndarray, order: List[int]):
+    """
+    Разворачивает ход с фиксированным порядком кубиков по уровням.
+    Возвращает терминальные состояния всех глубин:
+    (origins, paths (T, len(order), 2) с -1 в неиспользованных шагах, boards, lengths).
+    """
+    n = len(boards)
+    width = len(order)
+    origins = np.arange(n)
+    paths = np.full((n, width, 2), -1, dtype=np.int8)
+    states = boards
+    terminals = []
+
+    for depth, die in enumerate(order, 1):
+        mask, rows, froms, tos, new_boards = _single_die_moves(states, die)
+
+        # Состояния без хода этим кубиком - терминальные на предыдущей глубине
+        if depth > 1:
+            stuck = ~mask.any(axis=1)
+            terminals.append((origins[stuck], paths[stuck], states[stuck], depth - 1))
+
+        origins = origins[rows]
+        paths = paths[rows]
+        paths[:, depth - 1, 0] = froms
+        paths[:, depth - 1, 1] = tos
+        states = new_boards
+        if depth > 1:
+            origins, paths, states = _dedup(origins, paths, states)
+
+    terminals.append((origins, paths, states, width))
+    return (
+        np.concatenate([t[0] for t in terminals]),
+        np.concatenate([t[1] for t in terminals]),
+        np.concatenate([t[2] for t in terminals]),
+        np.concatenate([np.full(len(t[0]), t[3], dtype=np.int8) for t in terminals]),
+    )
+
+
+def _canonical_turn_arrays(boards: np.ndarray, dice: List[int]):
+    n = len(boards)
+    is_double = len(dice) > 2 and len(set(dice)) == 1
+    orders = [list(dice)] if len(set(dice)) == 1 else [list(dice), list(reversed(dice))]
+
+    parts = [_expand_order(boards, order) + (order[0],) for order in orders]
+    origins = np.concatenate([p[0] for p in parts])
+    paths = np.concatenate([p[1] for p in parts])
+    finals = np.concatenate([p[2] for p in parts])
+    lengths = np.concatenate([p[3] for p in parts])
+    first_dice = np.concatenate([np.full(len(p[0]), p[4], dtype=np.int8) for p in parts])
+
+    # 1-2. Правило "Сыграть максимум"
+    max_len = np.zeros(n, dtype=np.int8)
+    np.maximum.at(max_len, origins, lengths)
+    keep = (lengths == max_len[origins]) & (lengths > 0)
+
+    # 3. Правило "Большего кубика" (как в _generate_all_possible_turns)
+    if not is_double and len(dice) == 2:
+        higher_die = max(dice)
+        is_higher = first_dice == higher_die
+        higher_possible = np.zeros(n, dtype=bool)
+        higher_possible[origins[keep & is_higher & (lengths == 1)]] = True
+        keep &= ~((lengths == 1) & higher_possible[origins] & ~is_higher)
+
+    origins, paths, finals = origins[keep], paths[keep], finals[keep]
+
+    # Одна последовательность на (первый шаг, итоговая позиция)
+    if len(origins):
+        _, index = np.unique(_state_keys(origins, paths[:, 0, :], finals), return_index=True)
+        order = np.lexsort((index, origins[index]))
+        index = index[order]
+        origins, paths, finals = origins[index], paths[index], finals[index]
+
+    return origins, paths, finals
+
+
+def batch_turn_arrays(boards, dice: List[int], player_sign):
+    """
+    Легальные полные ходы для (N, 28) досок в виде массивов (без словарей):
+    origins (T,) - номер исходной доски, paths (T, len(dice), 2) - шаги
+    (from, to), -1 для несыгранных кубиков, finals (T, 28) - итоговые доски.
+    Все в системе индексов игрока.
+    """
+    origins, paths, finals = _canonical_turn_arrays(to_canonical(boards, player_sign), list(dice))
+    if player_sign == c.PLAYER_WHITE:
+        return origins, paths, finals
+    played = paths >= 0
+    paths = np.where(played, _MIRROR[np.where(played, paths, 0)], -1).astype(np.int8)
+    return origins, paths, -finals[:, _MIRROR]
+
+
+def batch_possible_turns(boards, dice: List[int], player_sign) -> List[list]:
+    """
+    Легальные полные ходы для каждой из (N, 28) досок при одних кубиках.
+    Формат каждого элемента - как у get_all_possible_turns.
+    """
+    n = len(boards)
+    origins, paths, _ = batch_turn_arrays(boards, dice, player_sign)
+    results = [[] for _ in range(n)]
+    for origin, path in zip(origins.tolist(), paths.tolist()):
+        results[origin].append([{'from': fr, 'to': to} for fr, to in path if fr >= 0])
+    return results
+
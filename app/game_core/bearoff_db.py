@@ -0,0 +1,254 @@
+# app/game_core/bearoff_db.py
+"""
+Односторонняя база выброса (one-sided bear-off database).
+
+Для каждой расстановки до 15 фишек по 6 точкам дома (C(21, 6) = 54264
+позиции) хранится среднее число бросков до выброса всех фишек при лучшей
+игре. В гонке (контакта нет, все фишки бота дома) лучший ход - тот,
+после которого это число минимально, и gnubg для него не нужен.
+
+Позиция - кортеж (фишки на точке 1, ..., фишки на точке 6) с точки зрения
+стороны на ходу. Индекс в базе - лексикографический ранг кортежа
+среди всех кортежей с суммой не больше 15 (комбинаторная система счисления).
+
+Формат файла: заголовок b'BGBO', версия, число позиций ('<4sII'),
+затем float32 (порядок байт платформы) по индексу позиции.
+Во время работы файл отображается в память (mmap).
+
+Сборка (около минуты):
+    python -m app.game_core.bearoff_db
+"""
+
+import os
+import sys
+import mmap
+import struct
+import logging
+import argparse
+from array import array
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import constants as c
+from .canonical import canonical_board, from_canonical_packed
+from .move_codec import MOVE_BITS, TO_MASK, sequence_to_dicts
+from .move_generator import ALL_ROLLS, get_packed_turns
+
+logger = logging.getLogger(__name__)
+
+DB_FILE = os.path.join(os.path.dirname(__file__), 'data', 'bearoff_os.bin')
+
+POINTS = 6
+MAX_CHECKERS = 15
+POSITION_COUNT = comb(MAX_CHECKERS + POINTS, POINTS)
+
+_MAGIC = b'BGBO'
+_VERSION = 1
+_HEADER = struct.Struct('<4sII')
+
+Position = Tuple[int, ...]
+
+# _SUFFIXES[m][n] - число расстановок не больше n фишек на m точках
+_SUFFIXES = tuple(
+    tuple(comb(n + m, m) for n in range(MAX_CHECKERS + 1))
+    for m in range(POINTS + 1)
+)
+
+
+def position_index(position: Sequence[int]) -> int:
+    """Ранг расстановки (фишки на точках 1..6) среди всех расстановок до 15 фишек."""
+    index = 0
+    remaining = MAX_CHECKERS
+    for point, count in enumerate(position):
+        rest = _SUFFIXES[POINTS - point - 1]
+        for taken in range(count):
+            index += rest[remaining - taken]
+        remaining -= count
+    return index
+
+
+def iter_positions():
+    """Все расстановки в порядке индекса."""
+    def rec(prefix, remaining):
+        if len(prefix) == POINTS:
+            yield tuple(prefix)
+            return
+        for count in range(remaining + 1):
+            yield from rec(prefix + [count], remaining - count)
+    return rec([], MAX_CHECKERS)
+
+
+# --- Сборка ---
+
+def _play_die(position: Position, die: int) -> set:
+    """Расстановки после одного кубика (все фишки дома, соперник не мешает)."""
+    highest = 0
+    for point in range(POINTS, 0, -1):
+        if position[point - 1]:
+            highest = point
+            break
+    if not highest:
+        return {position}
+
+    results = set()
+    for point in range(1, highest + 1):
+        if not position[point - 1]:
+            continue
+        # Выброс с меньшей точки, чем кубик, - только с самой дальней
+        if point < die and point != highest:
+            continue
+        cells = list(position)
+        cells[point - 1] -= 1
+        if point > die:
+            cells[point - die - 1] += 1
+        results.add(tuple(cells))
+    return results
+
+
+def _play_roll(position: Position, roll) -> set:
+    high, low = roll
+    if high == low:
+        level = {position}
+        for _ in range(4):
+            level = {after for current in level for after in _play_die(current, high)}
+        return level
+
+    finals = set()
+    for first, second in ((high, low), (low, high)):
+        for middle in _play_die(position, first):
+            finals |= _play_die(middle, second)
+    return finals
+
+
+def _pips(position: Position) -> int:
+    return sum(count * point for point, count in enumerate(position, 1))
+
+
+def build_expected_rolls() -> array:
+    """Среднее число бросков до конца выброса для всех позиций (по индексу)."""
+    weights = [(roll, (1 if roll[0] == roll[1] else 2) / 36.0) for roll in ALL_ROLLS]
+    values = array('f', bytes(4 * POSITION_COUNT))
+    exact: Dict[Position, float] = {}
+
+    # Любой ход уменьшает сумму пипов: считаем от меньших сумм к большим
+    for position in sorted(iter_positions(), key=_pips):
+        if not any(position):
+            exact[position] = 0.0
+            continue
+        expected = 1.0
+        for roll, weight in weights:
+            expected += weight * min(exact[final] for final in _play_roll(position, roll))
+        exact[position] = expected
+        values[position_index(position)] = expected
+    return values
+
+
+def save_bearoff_db(values: array, path: str = DB_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(values)))
+        f.write(values.tobytes())
+
+
+# --- Использование ---
+
+class BearoffDatabase:
+    """База, отображенная в память: expected_rolls(позиция) - чтение одного float."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION or count != POSITION_COUNT:
+            self._mmap.close()
+            raise ValueError(f"Неизвестный формат базы выброса ({magic!r}, версия {version}, позиций {count}).")
+        self._values = memoryview(self._mmap)[_HEADER.size:].cast('f')
+
+    def expected_rolls(self, position: Sequence[int]) -> float:
+        return self._values[position_index(position)]
+
+
+_db: Optional[BearoffDatabase] = None
+
+
+def load_bearoff_db(path: Optional[str] = DB_FILE) -> bool:
+    """Открывает базу (вызывается при старте). Нет файла - выброс считает gnubg."""
+    global _db
+    if not path or not os.path.exists(path):
+        _db = None
+        logger.info(f"[BearoffDB] База выброса не загружена (нет файла: {path}).")
+        return False
+    try:
+        _db = BearoffDatabase(path)
+    except (OSError, ValueError, struct.error) as e:
+        _db = None
+        logger.error(f"[BearoffDB] Не удалось открыть базу выброса {path}: {e}")
+        return False
+    logger.info(f"[BearoffDB] База выброса открыта: {path}.")
+    return True
+
+
+def _home_position(work_board) -> Position:
+    return tuple(work_board[point] for point in range(c.POINT_1, c.POINT_1 + POINTS))
+
+
+def is_bearoff_race(work_board) -> bool:
+    """
+    Каноническая доска (ходят белые): все фишки белых дома или выброшены,
+    и ни одна фишка черных уже не может с ними встретиться.
+    """
+    if work_board.outside_white or work_board[c.BAR_BLACK]:
+        return False
+    highest = 0
+    for point in range(c.POINT_1 + POINTS - 1, c.POINT_1 - 1, -1):
+        if work_board[point] > 0:
+            highest = point
+            break
+    return not any(work_board[point] < 0 for point in range(c.POINT_1, highest))
+
+
+def choose_bearoff_turn(board, dice, player_sign) -> Optional[List[dict]]:
+    """
+    Ход в гонке на выброс, минимизирующий среднее число оставшихся бросков.
+    None - базы нет, позиция не гонка на выброс или ходов нет.
+    """
+    if _db is None or not dice:
+        return None
+    work_board = canonical_board(board, player_sign)
+    if not is_bearoff_race(work_board):
+        return None
+
+    best_turn = None
+    best_value = None
+    for turn in get_packed_turns(board, dice, player_sign):
+        canonical_turn = from_canonical_packed(turn, player_sign)
+        undo = []
+        for move in canonical_turn:
+            fr, to = move >> MOVE_BITS, move & TO_MASK
+            undo.append((fr, to, work_board.make_step(fr, to, c.PLAYER_WHITE)))
+        value = _db.expected_rolls(_home_position(work_board))
+        for fr, to, was_blot in reversed(undo):
+            work_board.unmake_step(fr, to, c.PLAYER_WHITE, was_blot)
+
+        if best_value is None or value < best_value:
+            best_turn, best_value = turn, value
+
+    return sequence_to_dicts(best_turn) if best_turn is not None else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сборка односторонней базы выброса")
+    parser.add_argument('--output', default=DB_FILE, help="путь к файлу базы")
+    args = parser.parse_args(argv)
+
+    values = build_expected_rolls()
+    save_bearoff_db(values, args.output)
+    full_home = (0, 0, 0, 0, 0, MAX_CHECKERS)
+    print(f"База выброса: {len(values)} позиций -> {args.output} "
+          f"(15 фишек на 6-й точке: {values[position_index(full_home)]:.3f} броска)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# app/game_core/bench_movegen.py
+"""
+Бенчмарк табличной генерации одиночных ходов (_MOVE_TABLE, _BAR_ENTRY,
+_furthest_home_point) против прежней реализации с циклами.
+
+Прежний _get_single_moves сохранен здесь как эталон (_loop_single_moves):
+на каждом вызове он собирал список занятых точек и для каждого кандидата
+на выброс заново просматривал доску в поисках более дальней фишки.
+
+Входные данные - доски из случайных партий (фиксированный seed), каждая
+с каждым кубиком и стороной. Перед замером результаты сверяются:
+табличная версия должна давать те же ходы в том же порядке.
+
+Запуск:
+    python -m app.game_core.bench_movegen
+    python -m app.game_core.bench_movegen --boards 5000 --repeat 7
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from . import board_state as board
+from . import constants as c
+from .board_state import Board, create_initial_board_state, make_move
+from .move_generator import _get_single_moves, _single_moves, get_all_possible_turns
+
+
+def _loop_single_moves(board_state, die, player_sign):
+    """Прежняя реализация _get_single_moves (до таблиц), без изменений логики."""
+    moves = []
+    player_bar = board.get_bar_pos(player_sign)
+
+    if board_state[player_bar] * player_sign > 0:
+        if player_sign == c.PLAYER_WHITE:
+            to_point = c.BAR_WHITE - die
+        else:
+            to_point = die
+
+        if board_state[to_point] * player_sign >= -1:
+            moves.append({'from': player_bar, 'to': to_point})
+        return moves
+
+    possible_starts = [i for i, count in enumerate(board_state[c.POINT_1:c.POINT_24+1], 1) if count * player_sign > 0]
+
+    if isinstance(board_state, board.Board):
+        is_all_home = board_state.is_all_home(player_sign)
+    else:
+        outer_board_range = board.get_outer_board_range(player_sign)
+        is_all_home = all(board_state[i] * player_sign <= 0 for i in outer_board_range)
+
+    bear_off_pos = board.get_home_pos(player_sign)
+
+    for fr in possible_starts:
+        to = fr - (die * player_sign)
+
+        if c.POINT_1 <= to <= c.POINT_24 and board_state[to] * player_sign >= -1:
+            moves.append({'from': fr, 'to': to})
+
+        elif is_all_home:
+            is_white_bear_off = (player_sign == c.PLAYER_WHITE and to <= c.HOME_WHITE)
+            is_black_bear_off = (player_sign == c.PLAYER_BLACK and to > c.POINT_24)
+
+            if is_white_bear_off or is_black_bear_off:
+                is_exact = (player_sign == c.PLAYER_WHITE and fr == die) or \
+                           (player_sign == c.PLAYER_BLACK and fr == (c.POINT_24 - die + 1))
+
+                if is_exact:
+                    moves.append({'from': fr, 'to': bear_off_pos})
+                    continue
+
+                is_furthest = True
+                if player_sign == c.PLAYER_WHITE:
+                    search_range = range(fr + 1, c.POINT_24 + 1)
+                else:
+                    search_range = range(c.POINT_1, fr)
+
+                for i in search_range:
+                    if board_state[i] * player_sign > 0:
+                        is_furthest = False
+                        break
+
+                if is_furthest:
+                    moves.append({'from': fr, 'to': bear_off_pos})
+
+    return moves
+
+
+def sample_boards(count, seed=1):
+    """Доски из случайных партий: все стадии игры, включая бар и выброс."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        current = create_initial_board_state()
+        sign = rng.choice((c.PLAYER_WHITE, c.PLAYER_BLACK))
+        while len(boards) < count:
+            dice = [rng.randint(1, 6), rng.randint(1, 6)]
+            if dice[0] == dice[1]:
+                dice *= 2
+            turns = get_all_possible_turns(current, dice, sign)
+            if turns:
+                current = current.copy()
+                for move in rng.choice(turns):
+                    make_move(current, move, sign)
+            boards.append(Board(current))
+            if current[c.HOME_WHITE] == 15 or current[c.HOME_BLACK] == -15:
+                break
+            sign = -sign
+    return boards
+
+
+def _inputs(boards):
+    return [(b, die, sign) for b in boards for die in range(1, 7) for sign in (c.PLAYER_WHITE, c.PLAYER_BLACK)]
+
+
+def check_equal(inputs):
+    """Число входов, на которых табличная и прежняя версии расходятся."""
+    return sum(1 for args in inputs if _get_single_moves(*args) != _loop_single_moves(*args))
+
+
+def time_best(fn, inputs, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for args in inputs:
+            fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк генерации одиночных ходов: таблицы против циклов")
+    parser.add_argument('--boards', type=int, default=2000, help="число досок из случайных партий")
+    parser.add_argument('--repeat', type=int, default=5, help="число прогонов (берется лучший)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    boards = sample_boards(args.boards, args.seed)
+    inputs = _inputs(boards) + _inputs([b.to_list() for b in boards])
+
+    mismatches = check_equal(inputs)
+    if mismatches:
+        print(f"РАСХОЖДЕНИЕ: {mismatches} из {len(inputs)} входов")
+        return 1
+
+    baseline = time_best(_loop_single_moves, inputs, args.repeat)
+    print(f"входов: {len(inputs)} (Board и list), лучший из {args.repeat} прогонов")
+    print(f"{'циклы (прежняя)':<28}{baseline:>8.3f} с")
+    for name, fn in (('таблицы, словари', _get_single_moves), ('таблицы, упакованные', _single_moves)):
+        elapsed = time_best(fn, inputs, args.repeat)
+        print(f"{name:<28}{elapsed:>8.3f} с  x{baseline / elapsed:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,212 @@
 # app/game_core/board_stete.py
 
+import random
+from array import array
 from . import constants as c
 
+BOARD_SIZE = 28
+
+# Веса ячеек для инкрементальных счетчиков Board (индекс -> вклад одной фишки).
+# Пипы: сколько шагов фишке осталось до выброса (бар = 25).
+_WHITE_PIPS = tuple(
+    i if c.POINT_1 <= i <= c.POINT_24 else (25 if i == c.BAR_WHITE else 0)
+    for i in range(BOARD_SIZE)
+)
+_BLACK_PIPS = tuple(
+    25 - i if c.POINT_1 <= i <= c.POINT_24 else (25 if i == c.BAR_BLACK else 0)
+    for i in range(BOARD_SIZE)
+)
+# Фишки вне "дома": внешняя доска и бар.
+_WHITE_OUTSIDE = tuple(1 if i in c.OUTER_BOARD_WHITE or i == c.BAR_WHITE else 0 for i in range(BOARD_SIZE))
+_BLACK_OUTSIDE = tuple(1 if i in c.OUTER_BOARD_BLACK or i == c.BAR_BLACK else 0 for i in range(BOARD_SIZE))
+
+
+# Таблица Zobrist: _ZOBRIST[i][v] - случайное 64-битное число для значения v
+# (-15..15) в ячейке i. Отрицательные v берутся с конца списка из 31 элемента.
+# Генератор с фиксированным seed дает одинаковые хэши во всех процессах.
+_ZOBRIST_SEED = 0x6E617264
+_MAX_CHECKERS = 15
+_zobrist_rng = random.Random(_ZOBRIST_SEED)
+_ZOBRIST = tuple(
+    tuple(_zobrist_rng.getrandbits(64) for _ in range(2 * _MAX_CHECKERS + 1))
+    for _ in range(BOARD_SIZE)
+)
+del _zobrist_rng
+
+
+def zobrist_hash(board) -> int:
+    """Полный (не инкрементальный) Zobrist-хэш доски любого типа."""
+    h = 0
+    for i in range(BOARD_SIZE):
+        h ^= _ZOBRIST[i][board[i]]
+    return h
+
+
+class Board(array):
+    """
+    Компактная доска: 28 ячеек int8 (тот же формат индексов, что и у списка).
+    Чтение по индексу идет напрямую через array, а запись через __setitem__
+    поддерживает счетчики пипов и фишек вне дома, поэтому is_all_home - O(1).
+    Zobrist-хэш (атрибут zobrist) тоже обновляется при каждой записи за O(1).
+    Срез (board[:28]) возвращает array, для payload используйте to_list().
+    """
+    __slots__ = ('pips_white', 'pips_black', 'outside_white', 'outside_black', 'zobrist')
+
+    def __new__(cls, cells=None):
+        if cells is None:
+            cells = [0] * BOARD_SIZE
+        self = super().__new__(cls, 'b', cells)
+        if len(self) != BOARD_SIZE:
+            raise ValueError(f"Ожидалось {BOARD_SIZE} ячеек, получено {len(self)}")
+
+        if isinstance(cells, Board):
+            self.pips_white, self.pips_black = cells.pips_white, cells.pips_black
+            self.outside_white, self.outside_black = cells.outside_white, cells.outside_black
+            self.zobrist = cells.zobrist
+        else:
+            self._recount()
+        return self
+
+    def _recount(self):
+        self.pips_white = self.pips_black = 0
+        self.outside_white = self.outside_black = 0
+        for i, count in enumerate(self):
+            if count > 0:
+                self.pips_white += count * _WHITE_PIPS[i]
+                self.outside_white += count * _WHITE_OUTSIDE[i]
+            elif count < 0:
+                self.pips_black -= count * _BLACK_PIPS[i]
+                self.outside_black -= count * _BLACK_OUTSIDE[i]
+        self.zobrist = zobrist_hash(self)
+
+    def __setitem__(self, index, value):
+        old = array.__getitem__(self, index)
+        array.__setitem__(self, index, value)
+
+        # Белые - положительные значения, черные - отрицательные
+        delta = (value if value > 0 else 0) - (old if old > 0 else 0)
+        if delta:
+            self.pips_white += delta * _WHITE_PIPS[index]
+            self.outside_white += delta * _WHITE_OUTSIDE[index]
+        delta = (-value if value < 0 else 0) - (-old if old < 0 else 0)
+        if delta:
+            self.pips_black += delta * _BLACK_PIPS[index]
+            self.outside_black += delta * _BLACK_OUTSIDE[index]
+        self.zobrist ^= _ZOBRIST[index][old] ^ _ZOBRIST[index][value]
+
+    def make_step(self, fr, to, player_sign) -> bool:
+        """
+        Быстрый путь для make_move: применяет легальный шаг на месте,
+        обновляя счетчики и хэш напрямую (без общего __setitem__).
+        """
+        setitem = array.__setitem__
+        old_fr, old_to = self[fr], self[to]
+        setitem(self, fr, old_fr - player_sign)
+        z = self.zobrist ^ _ZOBRIST[fr][old_fr] ^ _ZOBRIST[fr][old_fr - player_sign]
+        was_blot = False
+
+        if player_sign == c.PLAYER_WHITE:
+            self.pips_white -= _WHITE_PIPS[fr] - _WHITE_PIPS[to]
+            self.outside_white -= _WHITE_OUTSIDE[fr] - _WHITE_OUTSIDE[to]
+            if c.POINT_1 <= to <= c.POINT_24 and old_to == -1:
+                old_bar = self[c.BAR_BLACK]
+                setitem(self, c.BAR_BLACK, old_bar - 1)
+                z ^= _ZOBRIST[c.BAR_BLACK][old_bar] ^ _ZOBRIST[c.BAR_BLACK][old_bar - 1]
+                self.pips_black += 25 - _BLACK_PIPS[to]
+                self.outside_black += 1 - _BLACK_OUTSIDE[to]
+                new_to = 1
+                was_blot = True
+            else:
+                new_to = old_to + 1
+        else:
+            self.pips_black -= _BLACK_PIPS[fr] - _BLACK_PIPS[to]
+            self.outside_black -= _BLACK_OUTSIDE[fr] - _BLACK_OUTSIDE[to]
+            if c.POINT_1 <= to <= c.POINT_24 and old_to == 1:
+                old_bar = self[c.BAR_WHITE]
+                setitem(self, c.BAR_WHITE, old_bar + 1)
+                z ^= _ZOBRIST[c.BAR_WHITE][old_bar] ^ _ZOBRIST[c.BAR_WHITE][old_bar + 1]
+                self.pips_white += 25 - _WHITE_PIPS[to]
+                self.outside_white += 1 - _WHITE_OUTSIDE[to]
+                new_to = -1
+                was_blot = True
+            else:
+                new_to = old_to - 1
+
+        setitem(self, to, new_to)
+        self.zobrist = z ^ _ZOBRIST[to][old_to] ^ _ZOBRIST[to][new_to]
+        return was_blot
+
+    def unmake_step(self, fr, to, player_sign, was_blot):
+        """Откат make_step."""
+        setitem = array.__setitem__
+        old_fr, old_to = self[fr], self[to]
+        setitem(self, fr, old_fr + player_sign)
+        z = self.zobrist ^ _ZOBRIST[fr][old_fr] ^ _ZOBRIST[fr][old_fr + player_sign]
+
+        if player_sign == c.PLAYER_WHITE:
+            self.pips_white += _WHITE_PIPS[fr] - _WHITE_PIPS[to]
+            self.outside_white += _WHITE_OUTSIDE[fr] - _WHITE_OUTSIDE[to]
+            if was_blot:
+                old_bar = self[c.BAR_BLACK]
+                setitem(self, c.BAR_BLACK, old_bar + 1)
+                z ^= _ZOBRIST[c.BAR_BLACK][old_bar] ^ _ZOBRIST[c.BAR_BLACK][old_bar + 1]
+                self.pips_black -= 25 - _BLACK_PIPS[to]
+                self.outside_black -= 1 - _BLACK_OUTSIDE[to]
+                new_to = -1
+            else:
+                new_to = old_to - 1
+        else:
+            self.pips_black += _BLACK_PIPS[fr] - _BLACK_PIPS[to]
+            self.outside_black += _BLACK_OUTSIDE[fr] - _BLACK_OUTSIDE[to]
+            if was_blot:
+                old_bar = self[c.BAR_WHITE]
+                setitem(self, c.BAR_WHITE, old_bar - 1)
+                z ^= _ZOBRIST[c.BAR_WHITE][old_bar] ^ _ZOBRIST[c.BAR_WHITE][old_bar - 1]
+                self.pips_white -= 25 - _WHITE_PIPS[to]
+                self.outside_white -= 1 - _WHITE_OUTSIDE[to]
+                new_to = 1
+            else:
+                new_to = old_to + 1
+
+        setitem(self, to, new_to)
+        self.zobrist = z ^ _ZOBRIST[to][old_to] ^ _ZOBRIST[to][new_to]
+
+    def __hash__(self):
+        return self.zobrist
+
+    def __reduce__(self):
+        return (Board, (self.to_list(),))
+
+    def copy(self) -> 'Board':
+        """Копия доски (memcpy буфера + перенос счетчиков)."""
+        return Board(self)
+
+    def key(self) -> bytes:
+        """Неизменяемый ключ позиции (28 байт) для словарей и множеств."""
+        return self.tobytes()
+
+    def to_list(self) -> list:
+        return self.tolist()
+
+    def pip_count(self, player_sign) -> int:
+        return self.pips_white if player_sign == c.PLAYER_WHITE else self.pips_black
+
+    def is_all_home(self, player_sign) -> bool:
+        """Все фишки игрока в доме (нет фишек на внешней доске и на баре)."""
+        if player_sign == c.PLAYER_WHITE:
+            return self.outside_white == 0
+        return self.outside_black == 0
+
+
+def copy_board(board):
+    """Копирует доску, сохраняя ее тип (Board или list)."""
+    return board.copy() if isinstance(board, Board) else list(board)
+
 def create_initial_board_state():
     """
     Создает доску, используя константы правил.
     """
-    board = [0] * 28  # 0-27
+    board = Board()  # 0-27
     
     # Белые (1)
     for pos, count in c.STANDARD_WHITE_SETUP.items():
@@ -23,7 +223,7 @@ def apply_move_to_board(board, move, player_sign):
     выполнять невалидные ходы, даже если они ей переданы.
     """
     
-    new_board = list(board)
+    new_board = copy_board(board)
     fr, to = move['from'], move['to']
 
     new_board[fr] -= player_sign
@@ -44,13 +244,59 @@ def apply_move_to_board(board, move, player_sign):
     
     return new_board
 
+def make_move(board, move, player_sign):
+    """
+    Применяет ОДИН легальный ход прямо к переданной доске (без копии).
+    Возвращает was_blot, который нужен для отката через unmake_move.
+    Используется генератором ходов при переборе.
+    """
+    fr, to = move['from'], move['to']
+    if isinstance(board, Board):
+        return board.make_step(fr, to, player_sign)
+
+    board[fr] -= player_sign
+
+    if c.POINT_1 <= to <= c.POINT_24:
+        if board[to] == -player_sign:
+            board[get_bar_pos(-player_sign)] -= player_sign
+            board[to] = player_sign
+            return True
+        board[to] += player_sign
+
+    elif to == c.HOME_WHITE or to == c.HOME_BLACK:
+        board[to] += player_sign
+
+    return False
+
+def unmake_move(board, move, player_sign, was_blot):
+    """
+    Откатывает ход, примененный make_move, прямо на переданной доске.
+    """
+    fr, to = move['from'], move['to']
+    if isinstance(board, Board):
+        board.unmake_step(fr, to, player_sign, was_blot)
+        return
+
+
+    if c.POINT_1 <= to <= c.POINT_24:
+        if was_blot:
+            board[get_bar_pos(-player_sign)] += player_sign
+            board[to] = -player_sign
+        else:
+            board[to] -= player_sign
+
+    elif to == c.HOME_WHITE or to == c.HOME_BLACK:
+        board[to] -= player_sign
+
+    board[fr] += player_sign
+
 def undo_move_on_board(board, last_move_data, player_sign, borne_off_white, borne_off_black):
     """
     Отменяет ход на доске.
     """
     step = last_move_data['step']
     was_blot = last_move_data['was_blot']
-    new_board = list(board)
+    new_board = copy_board(board)
     
     fr, to = step['from'], step['to']
 
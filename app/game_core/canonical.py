@@ -0,0 +1,89 @@
+# app/game_core/canonical.py
+"""
+Цветовая симметрия позиций.
+
+Позиция черных - зеркальное отражение позиции белых: точка i у белых
+соответствует точке 25 - i у черных, бары 25/27 и "дома" 0/26 меняются местами,
+знаки фишек инвертируются. Любую пару (доска, сторона) можно привести к
+каноническому виду "ходят белые", и кэши (генерация ходов, оценки gnubg,
+дебютная книга) будут общими для обоих цветов.
+"""
+
+from . import constants as c
+from .board_state import Board, BOARD_SIZE
+from .move_codec import MOVE_BITS, pack_move, sequence_to_dicts
+
+
+def _mirror_index(i: int) -> int:
+    if c.POINT_1 <= i <= c.POINT_24:
+        return 25 - i
+    if i == c.HOME_WHITE:
+        return c.HOME_BLACK
+    if i == c.HOME_BLACK:
+        return c.HOME_WHITE
+    if i == c.BAR_WHITE:
+        return c.BAR_BLACK
+    return c.BAR_WHITE
+
+# Перестановка индексов доски (инволюция: MIRROR[MIRROR[i]] == i)
+MIRROR = tuple(_mirror_index(i) for i in range(BOARD_SIZE))
+# То же для упакованных шагов (move_codec): MIRROR_MOVE[pack_move(f, t)]
+MIRROR_MOVE = tuple(
+    pack_move(MIRROR[move >> MOVE_BITS], MIRROR[move & ((1 << MOVE_BITS) - 1)])
+    if (move >> MOVE_BITS) < BOARD_SIZE and (move & ((1 << MOVE_BITS) - 1)) < BOARD_SIZE else -1
+    for move in range(BOARD_SIZE << MOVE_BITS)
+)
+
+
+def mirror_board(board) -> Board:
+    """Отражает доску: фишки черных становятся фишками белых и наоборот."""
+    return Board([-board[MIRROR[i]] for i in range(BOARD_SIZE)])
+
+
+def mirror_move(move: dict) -> dict:
+    """Отражает ход {'from', 'to'} в систему индексов другого цвета."""
+    return {'from': MIRROR[move['from']], 'to': MIRROR[move['to']]}
+
+
+def mirror_turns(turns: list) -> list:
+    """Отражает список последовательностей ходов."""
+    return [[mirror_move(move) for move in sequence] for sequence in turns]
+
+
+def canonical_board(board, player_sign) -> Board:
+    """Доска с точки зрения стороны на ходу (всегда как будто ходят белые)."""
+    if player_sign == c.PLAYER_WHITE:
+        return Board(board)
+    return mirror_board(board)
+
+
+def canonical_position_key(board, player_sign) -> bytes:
+    """
+    Ключ позиции, не зависящий от цвета стороны на ходу.
+    Позиции, зеркальные друг другу, дают одинаковый ключ.
+    """
+    return canonical_board(board, player_sign).key()
+
+
+def from_canonical_turns(turns: list, player_sign) -> list:
+    """Переводит ходы из канонической системы (белые) в систему player_sign."""
+    if player_sign == c.PLAYER_WHITE:
+        return list(turns)
+    return mirror_turns(turns)
+
+
+def from_canonical_packed(sequence, player_sign) -> tuple:
+    """Упакованная последовательность шагов в системе player_sign."""
+    if player_sign == c.PLAYER_WHITE:
+        return tuple(sequence)
+    return tuple(MIRROR_MOVE[move] for move in sequence)
+
+
+def packed_turns_to_dicts(turns, player_sign) -> list:
+    """
+    Упакованные канонические последовательности -> possible_turns
+    (списки словарей) в системе player_sign.
+    """
+    if player_sign == c.PLAYER_WHITE:
+        return [sequence_to_dicts(sequence) for sequence in turns]
+    return [sequence_to_dicts(MIRROR_MOVE[move] for move in sequence) for sequence in turns]
@@ -0,0 +1,210 @@
+# app/game_core/eval_cache.py
+"""
+Постоянный кэш решений gnubg.
+
+Ключ - (Position ID, Match ID, уровень бота): Position ID задает доску
+с точки зрения стороны на ходу, Match ID - кубики и сторону на ходу,
+поэтому одинаковый ключ означает одинаковый запрос к gnubg.
+Значение - выбранный gnubg ход (упакованные шаги move_codec в системе
+стороны на ходу).
+
+Два уровня: LRUCache в памяти процесса и таблица SQLite в папке instance.
+SQLite переживает перезапуск и общая для всех процессов сервера
+(режим WAL: читатели не ждут писателя). Кэш не обязателен для работы:
+ошибки базы пишутся в лог, запрос просто уходит в gnubg.
+
+Вызовы sqlite3 блокирующие и eventlet их не патчит, поэтому обращения
+к базе идут через move_offload.run_off_hub (системный поток eventlet.tpool),
+а ожидание блокировки другим процессом коротко: занятая база - промах кэша,
+а не простой хаба.
+"""
+
+import sqlite3
+import logging
+import threading
+from typing import Optional, Sequence, Tuple
+
+from .move_offload import run_off_hub
+from .turn_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_SIZE = 20000
+DB_TIMEOUT = 0.2 # сек. ожидания блокировки базы другим процессом (дольше - пропускаем кэш)
+DB_INIT_TIMEOUT = 5.0 # сек.; создание схемы при старте может подождать
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS gnubg_moves (
+    position_id TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    bot_level TEXT NOT NULL,
+    move TEXT NOT NULL,
+    PRIMARY KEY (position_id, match_id, bot_level)
+) WITHOUT ROWID
+'''
+
+
+def _encode_move(moves: Sequence[int]) -> str:
+    return ','.join(str(move) for move in moves)
+
+
+def _decode_move(text: str) -> Tuple[int, ...]:
+    return tuple(int(move) for move in text.split(',')) if text else ()
+
+
+class GnuBGEvalCache:
+    """
+    Кэш ходов gnubg: память процесса + файл SQLite (db_path=None - только память).
+    Соединения с базой открываются на каждую операцию, как в user_service:
+    так кэш безопасен и для потоков, и для нескольких процессов.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, memory_size: int = DEFAULT_MEMORY_SIZE):
+        self.db_path = db_path
+        self.memory = LRUCache(max_size=memory_size, ttl=None)
+        self._stats_lock = threading.Lock()
+        self.db_hits = 0
+        self.db_errors = 0
+        if db_path:
+            self._init_db()
+
+    def _connect(self, timeout: float = DB_TIMEOUT) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=timeout)
+
+    def _init_db(self):
+        try:
+            conn = self._connect(DB_INIT_TIMEOUT)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(_SCHEMA)
+                conn.commit()
+            finally:
+                conn.close()
+            logger.info(f"[EvalCache] База кэша gnubg: {self.db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"[EvalCache] Не удалось открыть базу кэша gnubg ({self.db_path}): {e}. Только память.")
+            self.db_path = None
+
+    def _db_error(self, action: str, e: Exception):
+        with self._stats_lock:
+            self.db_errors += 1
+        logger.warning(f"[EvalCache] Ошибка базы кэша gnubg при {action}: {e}")
+
+    def _db_select(self, key) -> Optional[tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(
+                'SELECT move FROM gnubg_moves WHERE position_id = ? AND match_id = ? AND bot_level = ?',
+                key
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def _db_write(self, sql: str, params: tuple):
+        conn = self._connect()
+        try:
+            conn.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _db_count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM gnubg_moves').fetchone()[0]
+        finally:
+            conn.close()
+
+    def get(self, position_id: str, match_id: str, bot_level: str) -> Optional[Tuple[int, ...]]:
+        """Ход gnubg для ключа или None."""
+        key = (position_id, match_id, bot_level)
+        moves = self.memory.get(key)
+        if moves is not None or not self.db_path:
+            return moves
+
+        try:
+            row = run_off_hub(self._db_select, key)
+        except sqlite3.Error as e:
+            self._db_error("чтении", e)
+            return None
+
+        if row is None:
+            return None
+
+        moves = _decode_move(row[0])
+        self.memory.put(key, moves)
+        with self._stats_lock:
+            self.db_hits += 1
+        return moves
+
+    def put(self, position_id: str, match_id: str, bot_level: str, moves: Sequence[int]):
+        key = (position_id, match_id, bot_level)
+        moves = tuple(moves)
+        self.memory.put(key, moves)
+        if not self.db_path:
+            return
+
+        try:
+            run_off_hub(
+                self._db_write,
+                'INSERT OR REPLACE INTO gnubg_moves (position_id, match_id, bot_level, move) VALUES (?, ?, ?, ?)',
+                key + (_encode_move(moves),)
+            )
+        except sqlite3.Error as e:
+            self._db_error("записи", e)
+
+    def discard(self, position_id: str, match_id: str, bot_level: str):
+        """Удаляет запись (например, если сохраненный ход оказался нелегальным)."""
+        key = (position_id, match_id, bot_level)
+        self.memory.discard(key)
+        if not self.db_path:
+            return
+
+        try:
+            run_off_hub(
+                self._db_write,
+                'DELETE FROM gnubg_moves WHERE position_id = ? AND match_id = ? AND bot_level = ?',
+                key
+            )
+        except sqlite3.Error as e:
+            self._db_error("удалении", e)
+
+    def size_on_disk(self) -> Optional[int]:
+        """Число записей в базе (None - базы нет или ошибка)."""
+        if not self.db_path:
+            return None
+        try:
+            return run_off_hub(self._db_count)
+        except sqlite3.Error as e:
+            self._db_error("подсчете", e)
+            return None
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        with self._stats_lock:
+            stats.update(db_path=self.db_path, db_hits=self.db_hits, db_errors=self.db_errors)
+        return stats
+
+
+_cache: Optional[GnuBGEvalCache] = None
+
+
+def configure_eval_cache(db_path: Optional[str], memory_size: int):
+    """
+    Включает кэш решений gnubg (из конфига приложения).
+    db_path=None - только память процесса; memory_size <= 0 и нет db_path - кэш выключен.
+    """
+    global _cache
+    if not db_path and memory_size <= 0:
+        _cache = None
+        logger.info("[EvalCache] Кэш решений gnubg выключен.")
+        return
+    _cache = GnuBGEvalCache(db_path, memory_size)
+
+
+def get_eval_cache() -> Optional[GnuBGEvalCache]:
+    return _cache
+
+
+def get_eval_cache_stats() -> Optional[dict]:
+    return _cache.stats() if _cache is not None else None
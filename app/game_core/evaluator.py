@@ -0,0 +1,170 @@
+# app/game_core/evaluator.py
+"""
+Встроенный линейный оценщик позиций (в духе pubeval) - движок для слабых ботов.
+
+gnubg - внешний процесс, и легкий бот обходится так же дорого, как сильный.
+Здесь все итоговые позиции кандидатов (легальные ходы из get_packed_turns)
+собираются в массив (N, 28), кодируются признаками и оцениваются одним
+матричным умножением: score = features @ weights. Выбирается ход
+с наибольшей оценкой. Без процессов, доли миллисекунды на ход.
+
+Как и в pubeval, весов два набора: для контактной игры и для гонки
+(фишки разошлись, важны только пипы и выброс). Веса подобраны вручную.
+Позиции оцениваются в канонической системе (только что ходили белые).
+"""
+
+import random
+from typing import List, Optional
+
+import numpy as np
+
+from . import constants as c
+from .board_state import BOARD_SIZE
+from .canonical import canonical_board, from_canonical_packed
+from .move_codec import MOVE_BITS, TO_MASK, sequence_to_dicts
+from .move_generator import get_packed_turns
+
+ENGINE_GNUBG = 'gnubg'
+ENGINE_LINEAR = 'linear'
+ENGINES = (ENGINE_GNUBG, ENGINE_LINEAR)
+
+_POINTS = np.arange(c.POINT_1, c.POINT_24 + 1)
+
+FEATURES = (
+    'pip_diff',        # (пипы черных - пипы белых) / 10
+    'borne_off',       # выброшенные фишки белых
+    'exposed_blots',   # блоты белых, до которых могут дойти черные
+    'direct_shots',    # блоты белых в пределах 6 пунктов от фишки черных (прямой удар)
+    'home_points',     # закрытые пункты в доме белых (1-6)
+    'outer_points',    # закрытые пункты 7-11 (блок перед задними фишками черных)
+    'prime',           # длина самой длинной цепочки закрытых пунктов
+    'opp_on_bar',      # фишки черных на баре
+    'own_on_bar',      # фишки белых на баре
+    'anchors',         # закрытые пункты белых в доме черных (19-24)
+    'stacks',          # лишние фишки на пунктах (сверх трех)
+    'home_gaps',       # пустые пункты дома ниже самой дальней фишки (гонка)
+)
+
+CONTACT_WEIGHTS = np.array([
+    1.0, 0.1, -0.6, -0.9, 0.5, 0.3, 0.35, 1.2, -0.8, 0.3, -0.2, 0.0,
+])
+RACE_WEIGHTS = np.array([
+    1.0, 0.3, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, -0.15, -0.25,
+])
+
+
+def encode_positions(boards: np.ndarray):
+    """
+    Признаки (N, len(FEATURES)) для канонических досок (N, 28)
+    и маска контакта (N,): True - соперники еще могут встретиться.
+    """
+    boards = boards.astype(np.int16)
+    points = boards[:, c.POINT_1:c.POINT_24 + 1]
+    own = np.maximum(points, 0)
+    opp = np.maximum(-points, 0)
+    own_bar = boards[:, c.BAR_WHITE]
+    opp_bar = -boards[:, c.BAR_BLACK]
+
+    own_pips = own @ _POINTS + 25 * own_bar
+    opp_pips = opp @ (25 - _POINTS) + 25 * opp_bar
+
+    # Черные идут от 1 к 24 (с бара - с "нулевой" точки): фишка на i
+    # достижима, если хоть одна фишка черных стоит ниже.
+    # below[:, j] - число пунктов черных ниже пункта j + 1
+    opp_present = opp > 0
+    below = np.zeros((len(boards), points.shape[1] + 1), dtype=np.int16)
+    np.cumsum(opp_present, axis=1, out=below[:, 1:])
+    on_bar = (opp_bar > 0)[:, None]
+    opp_below = (below[:, :-1] > 0) | on_bar
+    # Фишка черных в пределах 6 пунктов ниже (или на баре для пунктов 1-6)
+    near = below[:, :-1] > below[:, np.maximum(_POINTS - 7, 0)]
+    near[:, :6] |= on_bar
+
+    blots = own == 1
+    made = own >= 2
+
+    # Самая длинная цепочка закрытых пунктов: длина серии = номер пункта
+    # минус номер последнего открытого пункта перед ним
+    last_open = np.maximum.accumulate(np.where(made, 0, _POINTS), axis=1)
+    prime = (_POINTS - last_open).max(axis=1)
+
+    # Контакт: самая дальняя фишка белых дальше самой задней фишки черных
+    own_present = own > 0
+    furthest_own = np.where(
+        own_bar > 0, 25,
+        np.where(own_present.any(axis=1), c.POINT_24 - np.argmax(own_present[:, ::-1], axis=1), 0)
+    )
+    rearmost_opp = np.where(
+        opp_bar > 0, 0,
+        np.where(opp_present.any(axis=1), c.POINT_1 + np.argmax(opp_present, axis=1), 25)
+    )
+    contact = furthest_own > rearmost_opp
+
+    home = own[:, :6]
+    home_gaps = ((home == 0) & (_POINTS[:6] < furthest_own[:, None])).sum(axis=1)
+
+    features = np.stack([
+        (opp_pips - own_pips) / 10.0,
+        boards[:, c.HOME_WHITE],
+        (blots & opp_below).sum(axis=1),
+        (blots & near).sum(axis=1),
+        made[:, :6].sum(axis=1),
+        made[:, 6:11].sum(axis=1),
+        prime,
+        opp_bar,
+        own_bar,
+        made[:, 18:24].sum(axis=1),
+        np.maximum(own - 3, 0).sum(axis=1),
+        home_gaps,
+    ], axis=1).astype(np.float64)
+    return features, contact
+
+
+def evaluate_positions(boards) -> np.ndarray:
+    """Оценки (N,) канонических позиций после хода белых: больше - лучше для белых."""
+    features, contact = encode_positions(np.asarray(boards, dtype=np.int8).reshape(-1, BOARD_SIZE))
+    return np.where(contact, features @ CONTACT_WEIGHTS, features @ RACE_WEIGHTS)
+
+
+def _final_boards(work_board, turns) -> np.ndarray:
+    """
+    Итоговые доски (N, 28) для канонических упакованных ходов: шаги всех
+    ходов применяются к копиям доски по одному уровню за раз.
+    """
+    width = max(len(turn) for turn in turns)
+    moves = np.array([turn + (-1,) * (width - len(turn)) for turn in turns], dtype=np.int16).reshape(len(turns), width)
+    boards = np.repeat(np.frombuffer(work_board.key(), dtype=np.int8)[None, :], len(turns), axis=0)
+    rows_all = np.arange(len(turns))
+
+    for step in range(width):
+        active = moves[:, step] >= 0
+        rows = rows_all[active]
+        froms = moves[active, step] >> MOVE_BITS
+        tos = moves[active, step] & TO_MASK
+        boards[rows, froms] -= 1
+        hit = (tos >= c.POINT_1) & (tos <= c.POINT_24) & (boards[rows, tos] == -1)
+        boards[rows[hit], tos[hit]] = 0
+        boards[rows[hit], c.BAR_BLACK] -= 1
+        boards[rows, tos] += 1
+    return boards
+
+
+def choose_linear_turn(board, dice, player_sign, noise: float = 0.0, rng: Optional[random.Random] = None) -> Optional[List[dict]]:
+    """
+    Лучший по линейной оценке ход (список словарей, как у gnubg_service)
+    или None, если ходов нет. noise > 0 - к оценкам добавляется гауссов шум
+    (ослабленный бот).
+    """
+    if not dice:
+        return None
+    turns = get_packed_turns(board, dice, player_sign)
+    if not turns:
+        return None
+
+    canonical_turns = [from_canonical_packed(turn, player_sign) for turn in turns]
+    scores = evaluate_positions(_final_boards(canonical_board(board, player_sign), canonical_turns))
+    if noise > 0:
+        rng = rng or random
+        scores = scores + np.array([rng.gauss(0.0, noise) for _ in range(len(scores))])
+
+    return sequence_to_dicts(turns[int(np.argmax(scores))])
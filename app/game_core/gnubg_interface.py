@@ -3,17 +3,55 @@
 import subprocess
 import os
 import sys
+import time
+import queue
+import shutil
+import logging
+import itertools
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+GNUBG_COMMAND = ['gnubg']
+GNUBG_CWD = os.path.dirname(os.path.abspath(__file__))
+
+# Команды, которые выполняются один раз при старте долгоживущего процесса.
+# Без них gnubg может спросить подтверждение (y/n) при смене позиции
+# и "съесть" следующую строку из нашего пакета команд.
+_WORKER_INIT_COMMANDS = (
+    "set confirm new off\n"
+)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_REQUEST_TIMEOUT = 15.0
+DEFAULT_HEALTHCHECK_INTERVAL = 60.0
+# Сколько ждать ожидаемую строку после маркера (сек.): stdout и сообщение
+# об ошибке (маркер) идут разными потоками вывода и могут прийти в любом порядке
+AFTER_MARKER_GRACE = 1.0
+
+
+def _worker_command() -> list:
+    """
+    Команда запуска долгоживущего процесса. stdout в канал обычно буферизуется
+    блоками; stdbuf (если есть) переводит его в построчный режим, чтобы вывод
+    пакета не застревал в буфере до следующего запроса.
+    """
+    if shutil.which('stdbuf'):
+        return ['stdbuf', '-oL'] + GNUBG_COMMAND
+    return list(GNUBG_COMMAND)
+
 
 def run_gnubg_process(command_input: str) -> str:
 
     process = subprocess.Popen(
-        ['gnubg'],
+        GNUBG_COMMAND,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
         encoding='utf-8',
-        cwd=os.path.dirname(os.path.abspath(__file__)) 
+        cwd=GNUBG_CWD
     )
 
     try:
@@ -23,4 +61,280 @@ def run_gnubg_process(command_input: str) -> str:
     except Exception as e:
         print(f"[GnuBGInterface] Ошибка во время run_gnubg_process: {e}", file=sys.stderr)
         process.kill()
-        return ""
\ No newline at end of file
+        return ""
+
+
+class GnuBGWorkerError(Exception):
+    """Процесс gnubg упал, не ответил вовремя или не смог стартовать."""
+
+
+class GnuBGWorker:
+    """
+    Один долгоживущий процесс gnubg, управляемый через stdin/stdout.
+
+    Каждый пакет команд завершается уникальным маркером (несуществующей
+    командой), на которую gnubg отвечает "Unknown command ...". Ответ
+    на маркер может обогнать буферизованный stdout, поэтому пакет с
+    ожидаемым выводом (until) закончен, только когда прочитаны и маркер,
+    и строка until. Не дождались - процесс считается испорченным
+    (GnuBGWorkerError, пул его перезапустит): хвост ответа не попадет
+    в следующий запрос. Остатки вывода перед новым пакетом отбрасываются.
+    """
+
+    _marker_counter = itertools.count(1)
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.Queue] = None
+        self.last_used = 0.0
+
+    def start(self, timeout: float):
+        self.process = subprocess.Popen(
+            _worker_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            bufsize=1,
+            cwd=GNUBG_CWD
+        )
+        self._lines = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_stdout,
+            args=(self.process, self._lines),
+            name=f"GnuBGReader-{self.worker_id}",
+            daemon=True
+        )
+        reader.start()
+        self.last_used = time.monotonic()
+        # Заодно дожидаемся, пока gnubg загрузится и начнет отвечать.
+        self.execute(_WORKER_INIT_COMMANDS, timeout)
+
+    @staticmethod
+    def _read_stdout(process: subprocess.Popen, lines: queue.Queue):
+        """Фоновый поток: перекладывает stdout процесса в очередь строк."""
+        try:
+            for line in process.stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            lines.put(None) # EOF: процесс завершился
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _write(self, data: str):
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise GnuBGWorkerError(f"Не удалось записать в stdin gnubg: {e}")
+
+    def _drain_stale_output(self):
+        """Отбрасывает строки, оставшиеся от прошлого пакета."""
+        stale = 0
+        while True:
+            try:
+                line = self._lines.get_nowait()
+            except queue.Empty:
+                break
+            if line is None:
+                raise GnuBGWorkerError("Процесс gnubg завершился.")
+            stale += 1
+        if stale:
+            logger.debug(f"[GnuBGWorker-{self.worker_id}] Отброшено строк от прошлого пакета: {stale}")
+
+    def execute(self, command_input: str, timeout: float, until: Optional[str] = None) -> str:
+        """
+        Отправляет пакет команд и возвращает его вывод (без строки маркера).
+        until - подстрока строки, без которой ответ неполон (например,
+        "1. Cubeful" для hint): ее ждем и после маркера, но не дольше
+        AFTER_MARKER_GRACE. При таймауте или падении процесса бросает GnuBGWorkerError.
+        """
+        if not self.is_alive():
+            raise GnuBGWorkerError("Процесс gnubg не запущен.")
+        self._drain_stale_output()
+
+        marker = f"__gnubg_pool_sync_{next(self._marker_counter)}__"
+        if not command_input.endswith("\n"):
+            command_input += "\n"
+        self._write(f"{command_input}{marker}\n")
+
+        deadline = time.monotonic() + timeout
+        output = []
+        marker_seen = False
+        expected_seen = until is None
+        while not (marker_seen and expected_seen):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if marker_seen:
+                    raise GnuBGWorkerError(f"gnubg не вывел {until!r} после маркера.")
+                raise GnuBGWorkerError(f"Таймаут ответа gnubg ({timeout:.1f} сек).")
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+
+            if line is None:
+                raise GnuBGWorkerError("Процесс gnubg завершился во время запроса.")
+            if marker in line:
+                marker_seen = True
+                deadline = min(deadline, time.monotonic() + AFTER_MARKER_GRACE)
+                continue
+            if not expected_seen and until in line:
+                expected_seen = True
+            output.append(line)
+
+        self.last_used = time.monotonic()
+        return "".join(output)
+
+    def ping(self, timeout: float) -> bool:
+        """Проверка здоровья: процесс жив и отвечает на пустой пакет."""
+        try:
+            self.execute("", timeout)
+            return True
+        except GnuBGWorkerError:
+            return False
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception as e:
+            logger.warning(f"[GnuBGWorker-{self.worker_id}] Ошибка при остановке процесса: {e}")
+        finally:
+            self.process = None
+
+
+class GnuBGProcessPool:
+    """
+    Пул долгоживущих процессов gnubg.
+    Процесс стартует и загружает веса нейросети один раз, а затем
+    обслуживает запросы по очереди. Упавшие и зависшие процессы
+    перезапускаются, простаивающие - проверяются перед выдачей.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        healthcheck_interval: float = DEFAULT_HEALTHCHECK_INTERVAL
+    ):
+        self.size = max(1, int(size))
+        self.request_timeout = float(request_timeout)
+        self.healthcheck_interval = float(healthcheck_interval)
+
+        self._idle: queue.Queue = queue.Queue()
+        self._workers = [GnuBGWorker(worker_id) for worker_id in range(self.size)]
+        for worker in self._workers:
+            self._start_worker(worker)
+            self._idle.put(worker)
+
+        logger.info(f"[GnuBGPool] Инициализирован. Процессов: {self.size}, таймаут: {self.request_timeout} сек.")
+
+    def _start_worker(self, worker: GnuBGWorker) -> bool:
+        try:
+            worker.start(self.request_timeout)
+            return True
+        except Exception as e:
+            logger.error(f"[GnuBGPool] Не удалось запустить gnubg (worker {worker.worker_id}): {e}")
+            worker.stop()
+            return False
+
+    def _restart_worker(self, worker: GnuBGWorker) -> bool:
+        logger.warning(f"[GnuBGPool] Перезапуск gnubg (worker {worker.worker_id}).")
+        worker.stop()
+        return self._start_worker(worker)
+
+    def _ensure_healthy(self, worker: GnuBGWorker) -> bool:
+        if not worker.is_alive():
+            return self._restart_worker(worker)
+
+        idle_for = time.monotonic() - worker.last_used
+        if idle_for >= self.healthcheck_interval and not worker.ping(self.request_timeout):
+            return self._restart_worker(worker)
+
+        return True
+
+    def run(self, command_input: str, until: Optional[str] = None) -> str:
+        """
+        Выполняет пакет команд на свободном процессе (until - см. GnuBGWorker.execute).
+        Возвращает вывод gnubg или "" при ошибке (как run_gnubg_process).
+        """
+        try:
+            worker = self._idle.get(timeout=self.request_timeout)
+        except queue.Empty:
+            logger.error(f"[GnuBGPool] Нет свободного процесса gnubg за {self.request_timeout} сек.")
+            return ""
+
+        try:
+            if not self._ensure_healthy(worker):
+                return ""
+
+            try:
+                return worker.execute(command_input, self.request_timeout, until)
+            except GnuBGWorkerError as e:
+                logger.error(f"[GnuBGPool] Ошибка worker {worker.worker_id}: {e}")
+                self._restart_worker(worker)
+                return ""
+        finally:
+            self._idle.put(worker)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+        logger.info("[GnuBGPool] Все процессы gnubg остановлены.")
+
+
+_pool: Optional[GnuBGProcessPool] = None
+_pool_lock = threading.Lock()
+_pool_settings = {
+    'size': DEFAULT_POOL_SIZE,
+    'request_timeout': DEFAULT_REQUEST_TIMEOUT,
+    'healthcheck_interval': DEFAULT_HEALTHCHECK_INTERVAL,
+}
+
+
+def configure_pool(size: int, request_timeout: float, healthcheck_interval: float):
+    """
+    Задает параметры пула (из конфига приложения).
+    size <= 0 отключает пул: каждый запрос запускает отдельный процесс.
+    """
+    global _pool
+    with _pool_lock:
+        _pool_settings.update(
+            size=size,
+            request_timeout=request_timeout,
+            healthcheck_interval=healthcheck_interval
+        )
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def get_pool() -> Optional[GnuBGProcessPool]:
+    """Возвращает общий пул, создавая его при первом обращении."""
+    global _pool
+    with _pool_lock:
+        if _pool is None and _pool_settings['size'] > 0:
+            _pool = GnuBGProcessPool(**_pool_settings)
+        return _pool
+
+
+def run_gnubg_command(command_input: str, until: Optional[str] = None) -> str:
+    """
+    Выполняет пакет команд (без 'exit') на процессе из пула.
+    until - строка, без которой ответ неполон (см. GnuBGWorker.execute).
+    Если пул отключен, запускает отдельный процесс, как раньше
+    ('exit' сбрасывает весь вывод, until не нужен).
+    """
+    pool = get_pool()
+    if pool is None:
+        return run_gnubg_process(command_input + "exit\n")
+    return pool.run(command_input, until)
@@ -2,6 +2,8 @@
 import re
 from typing import Optional, List
 
+from .canonical import from_canonical_turns
+
 _MOVE_ISLAND_RE = re.compile(
     r"((?:"
     r"\b(?:bar|off|\d{1,2})\*?"
@@ -88,26 +90,6 @@ def parse_gnubg_to_atomic_moves(move_string: str, bot_sign: int, dice: list) ->
 
         final_atomic_moves_gnubg.append({'from': _from_int, 'to': _to_int})
 
-    converted_moves = []
-    if bot_sign == -1:
-        for move in final_atomic_moves_gnubg:
-            new_from = 0
-            if move['from'] == 25: new_from = 27
-            elif 1 <= move['from'] <= 24: new_from = 25 - move['from']
-            else: new_from = move['from']
-            
-            new_to = 0
-            if move['to'] == 0: new_to = 26
-            elif 1 <= move['to'] <= 24: new_to = 25 - move['to']
-            else: new_to = move['to']
-            
-            converted_moves.append({'from': new_from, 'to': new_to})
-        return converted_moves
-    else:
-        for move in final_atomic_moves_gnubg:
-            new_from = move['from']
-            new_to = move['to']
-            if new_from == 25: new_from = 25
-            if new_to == 0: new_to = 0
-            converted_moves.append({'from': new_from, 'to': new_to})
-        return converted_moves
\ No newline at end of file
+    # gnubg всегда пишет ход с точки зрения стороны на ходу (как белые),
+    # т.е. в канонической системе - для черных ход нужно отразить.
+    return from_canonical_turns([final_atomic_moves_gnubg], bot_sign)[0]
@@ -4,10 +4,14 @@ import random
 import sys
 import threading
 import re
-from typing import List, Optional, Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 try:
-    from app.game_core import get_all_possible_turns
+    from app.game_core import get_packed_turns, has_legal_move
+    from .board_state import Board
+    from .move_codec import MOVE_BITS, TO_MASK, pack_move, sequence_from_dicts, sequence_to_dicts
     from .gunbg_posid import get_position_id, calculate_match_id
+    from .eval_cache import get_eval_cache
+    from .bearoff_db import choose_bearoff_turn
 except ImportError:
     print("CRITICAL ERROR: backgammon_logic.py or gunbg_posid.py not found.")
     sys.exit(1)
@@ -15,103 +19,141 @@ except ImportError:
 from . import gnubg_interface
 from . import gnubg_parser
 
-def _reduce_turn_path(turn_path: List[Dict[str, int]]) -> List[Dict[str, int]]:
+# Уровень бота в ключе кэша решений: у ботов разной силы разные ответы
+DEFAULT_BOT_LEVEL = 'hard'
+HINT_LINE = "1. Cubeful" # строка лучшего хода в выводе 'hint 1'
+
+def _reduce_turn_path(turn_path: Sequence[int]) -> List[int]:
     """
     "Схлопывает" путь из атомарных ходов в "брутто" ходы (откуда-куда).
     Эта версия корректно обрабатывает несколько ходов из одной точки.
-    Пример: [{'f': 12, 't': 17}, {'f': 12, 't': 17}, {'f': 14, 't': 19}, {'f': 19, 't': 24}]
-    -> [{'f': 12, 't': 17}, {'f': 12, 't': 17}, {'f': 14, 't': 24}]
+    Ходы - упакованные шаги (move_codec).
+    Пример: [12->17, 12->17, 14->19, 19->24] -> [12->17, 12->17, 14->24]
     """
     if not turn_path:
         return []
 
-    moves = [m.copy() for m in turn_path]
+    moves = list(turn_path)
     reduced_moves = []
 
     while moves:
-        all_current_tos = {m['to'] for m in moves}
+        all_current_tos = {m & TO_MASK for m in moves}
         
         start_move = None
         for m in moves:
-            if m['from'] not in all_current_tos:
+            if m >> MOVE_BITS not in all_current_tos:
                 start_move = m
                 break
         
-        if not start_move:
+        if start_move is None:
             reduced_moves.extend(moves)
             break
 
         moves.remove(start_move)
-        current_chain_from = start_move['from']
-        current_chain_to = start_move['to']
+        current_chain_from = start_move >> MOVE_BITS
+        current_chain_to = start_move & TO_MASK
         
         while True:
             next_move_in_chain = None
             for m in moves:
-                if m['from'] == current_chain_to:
+                if m >> MOVE_BITS == current_chain_to:
                     next_move_in_chain = m
                     break
             
-            if next_move_in_chain:
+            if next_move_in_chain is not None:
                 moves.remove(next_move_in_chain)
-                current_chain_to = next_move_in_chain['to']
+                current_chain_to = next_move_in_chain & TO_MASK
             else:
                 break
         
-        reduced_moves.append({'from': current_chain_from, 'to': current_chain_to})
+        reduced_moves.append(pack_move(current_chain_from, current_chain_to))
 
     return reduced_moves
 
-def _sort_moves(move_list: List[Dict[str, int]]) -> List[Dict[str, int]]:
-    """Сортирует список ходов для надежного сравнения."""
-    return sorted(move_list, key=lambda m: (m['from'], m['to']))
+def _sort_moves(move_list: Sequence[int]) -> List[int]:
+    """Сортирует список ходов для надежного сравнения (порядок как по (from, to))."""
+    return sorted(move_list)
 
 
-def get_gnubg_turn(board: list, dice: list, bot_sign: int) -> Optional[List[dict]]:
+def _final_position(board: Board, moves: Sequence[int], bot_sign: int) -> bytes:
+    """Ключ позиции после moves (доска восстанавливается)."""
+    undo = []
+    for move in moves:
+        fr, to = move >> MOVE_BITS, move & TO_MASK
+        undo.append((fr, to, board.make_step(fr, to, bot_sign)))
+    key = board.key()
+    for fr, to, was_blot in reversed(undo):
+        board.unmake_step(fr, to, bot_sign, was_blot)
+    return key
 
-    tid = threading.current_thread().name
-    print(f"[GnuBGService] ({tid}) Запрошен ход для бота (Знак: {bot_sign}) с кубиками {dice}")
-    
-    if not dice:
-        print(f"[GnuBGService] ({tid}) Нет кубиков, нет ходов.")
-        return None
 
-    all_possible_turns = get_all_possible_turns(board, dice, bot_sign)
-    if not all_possible_turns:
-        print(f"[GnuBGService] ({tid}) Нет доступных ходов (возвращаем None).")
+def _index_by_final_position(board: list, turns: List[Tuple[int, ...]], bot_sign: int) -> Dict[bytes, Tuple[int, ...]]:
+    """
+    Итоговая позиция -> первый легальный ход, который к ней приводит.
+    Сопоставление по позиции не зависит от записи хода (порядок шагов,
+    склеенные шаги "24/13", отметки взятия).
+    """
+    work_board = Board(board)
+    index = {}
+    for turn in turns:
+        index.setdefault(_final_position(work_board, turn, bot_sign), turn)
+    return index
+
+
+def match_by_final_position(board: list, moves: Sequence[int], legal_turns: List[Tuple[int, ...]],
+                             bot_sign: int) -> Optional[Tuple[int, ...]]:
+    """
+    Легальный ход из legal_turns с той же итоговой позицией, что и moves,
+    или None. Так сверяются ходы из внешних источников (gnubg, кэш решений,
+    дебютная книга): порядок шагов в legal_turns зависит от правила
+    склейки перестановок, а сам ход - нет.
+    """
+    if moves in legal_turns:
+        return tuple(moves)
+    try:
+        final = _final_position(Board(board), moves, bot_sign)
+    except (IndexError, OverflowError):
         return None
-        
-    stdout_output = ""
-    
-    pid = get_position_id(board, bot_sign)
-    player_index_api = 0 if bot_sign == 1 else 1 
+    return _index_by_final_position(board, legal_turns, bot_sign).get(final)
+
+
+def _index_by_reduced_path(turns: List[Tuple[int, ...]]) -> Dict[Tuple[int, ...], Tuple[int, ...]]:
+    """Запасной индекс: мультимножество "брутто" ходов (откуда-куда) -> легальный ход."""
+    index = {}
+    for turn in turns:
+        index.setdefault(tuple(_sort_moves(_reduce_turn_path(turn))), turn)
+    return index
+
+
+def _hint_commands(pid: str, mid: str, bot_sign: int) -> str:
+    """
+    Пакет команд для 'hint 1'. Процесс gnubg долгоживущий, поэтому
+    'swap players' в конце отменяется: следующий запрос начинается
+    с того же состояния игроков.
+    """
     player_index_console = 1 if bot_sign == 1 else 0
-    mid = calculate_match_id(
-        score0=0, score1=0, match_length=0, cube_value=1,
-        cube_owner=3, on_roll=player_index_api, turn_to_move=player_index_api,
-        game_state=1, crawford=False, double_offered=False, resign_offered=0,
-        die1=dice[0], die2=dice[1] if len(dice) > 1 else 0,
-        jacoby_off=False
+    return (
+        f"set matchid {mid}\n"
+        f"set board {pid}\n"
+        f"set turn {player_index_console}\n"
+        "swap players\n"
+        "hint 1\n"
+        "swap players\n"
     )
 
-    command_sequence = (
-        f"set matchid {mid}\n"        
-        f"set board {pid}\n"         
-        f"set turn {player_index_console}\n" 
-        "swap players\n"             
-        f"hint 1\n"
-        "exit\n"
-    )
 
+def _ask_gnubg(board: list, dice: list, bot_sign: int, pid: str, mid: str,
+               legal_turns: List[Tuple[int, ...]], tid: str) -> Tuple[int, ...]:
+    """Запрос к gnubg: выбранный им ход среди legal_turns (упакованные шаги)."""
     print('[GnuBGService] Был запрос на генерацию ГНУБГ хода.')
-    stdout_output = gnubg_interface.run_gnubg_process(command_sequence)
+    stdout_output = gnubg_interface.run_gnubg_command(_hint_commands(pid, mid, bot_sign), until=HINT_LINE)
     
     if not stdout_output:
         raise ValueError("GnuBG ничего не вернул (stdout пустой).")
     
     hint_line = ""
     for line in stdout_output.splitlines():
-        if "1. Cubeful" in line:
+        if HINT_LINE in line:
             hint_line = line
             break
     
@@ -126,37 +168,84 @@ def get_gnubg_turn(board: list, dice: list, bot_sign: int) -> Optional[List[dict
         
     print(f"--- [GnuBGService] ({tid}) Распарсен ход (строка): {move_string}")
     
-    bot_turn_from_parser = gnubg_parser.parse_gnubg_to_atomic_moves(
+    bot_turn_from_parser = sequence_from_dicts(gnubg_parser.parse_gnubg_to_atomic_moves(
         move_string,
         bot_sign,
         dice
-    )
+    ))
     
-    bot_atomic_sorted = _sort_moves(bot_turn_from_parser)
-    
-    bot_reduced_path = _reduce_turn_path(bot_turn_from_parser)
-    bot_reduced_sorted = _sort_moves(bot_reduced_path)
+    # Легальные ходы индексируются один раз по итоговой позиции, ответ gnubg
+    # находится одним поиском. Сравнение идет по упакованным шагам,
+    # словари строятся только для ответа.
+    bot_turn_moves = match_by_final_position(board, bot_turn_from_parser, legal_turns, bot_sign)
 
-    bot_turn_moves = None
+    bot_atomic_sorted = _sort_moves(bot_turn_from_parser)
+    bot_reduced_sorted = _sort_moves(_reduce_turn_path(bot_turn_from_parser))
 
-    for turn_option in all_possible_turns:
-        
-        if _sort_moves(turn_option) == bot_atomic_sorted:
-            bot_turn_moves = turn_option
-            break
-        
-        reduced_option = _reduce_turn_path(turn_option)
-        reduced_option_sorted = _sort_moves(reduced_option)
-        
-        if reduced_option_sorted == bot_reduced_sorted:
-            bot_turn_moves = turn_option
-            break
+    if bot_turn_moves is None:
+        bot_turn_moves = _index_by_reduced_path(legal_turns).get(tuple(bot_reduced_sorted))
 
     if not bot_turn_moves:
         
-        print(f"--- [GnuBGService] ({tid}) ОШИБКА СИНХРОНИЗАЦИИ! GnuBG (atomic): {bot_atomic_sorted} / (reduced): {bot_reduced_sorted}. Ни один из них не найден в `all_possible_turns`.")
+        print(f"--- [GnuBGService] ({tid}) ОШИБКА СИНХРОНИЗАЦИИ! GnuBG (atomic): {sequence_to_dicts(bot_atomic_sorted)} / (reduced): {sequence_to_dicts(bot_reduced_sorted)}. Ни один из них не найден среди легальных ходов.")
         raise ValueError("Ошибка синхронизации GnuBG (reduce fail).")
 
+    return bot_turn_moves
+
+
+def get_gnubg_turn(board: list, dice: list, bot_sign: int, bot_level: str = DEFAULT_BOT_LEVEL) -> Optional[List[dict]]:
+
+    tid = threading.current_thread().name
+    print(f"[GnuBGService] ({tid}) Запрошен ход для бота (Знак: {bot_sign}) с кубиками {dice}")
+    
+    if not dice:
+        print(f"[GnuBGService] ({tid}) Нет кубиков, нет ходов.")
+        return None
+
+    # Для проверки "есть ли ход" полный перебор не нужен
+    if not has_legal_move(board, dice, bot_sign):
+        print(f"[GnuBGService] ({tid}) Нет доступных ходов (возвращаем None).")
+        return None
+
+    # Гонка на выброс: лучший ход дает база выброса, gnubg не нужен
+    bearoff_turn = choose_bearoff_turn(board, dice, bot_sign)
+    if bearoff_turn is not None:
+        print(f"--- [GnuBGService] ({tid}) Ход из базы выброса: {bearoff_turn}")
+        return bearoff_turn
+        
+    pid = get_position_id(board, bot_sign)
+    player_index_api = 0 if bot_sign == 1 else 1 
+    mid = calculate_match_id(
+        score0=0, score1=0, match_length=0, cube_value=1,
+        cube_owner=3, on_roll=player_index_api, turn_to_move=player_index_api,
+        game_state=1, crawford=False, double_offered=False, resign_offered=0,
+        die1=dice[0], die2=dice[1] if len(dice) > 1 else 0,
+        jacoby_off=False
+    )
+
+    legal_turns = get_packed_turns(board, dice, bot_sign)
+
+    # (Position ID, Match ID, уровень) однозначно задают запрос к gnubg:
+    # ответ берется из кэша, если эту позицию с этим броском уже решали.
+    # Сохраненный ход сверяется с легальными по итоговой позиции, как и ответ gnubg:
+    # запись, сделанная при другом порядке шагов, остается действительной.
+    eval_cache = get_eval_cache()
+    bot_turn_moves = eval_cache.get(pid, mid, bot_level) if eval_cache is not None else None
+    if bot_turn_moves is not None:
+        bot_turn_moves = match_by_final_position(board, bot_turn_moves, legal_turns, bot_sign)
+        if bot_turn_moves is None:
+            print(f"--- [GnuBGService] ({tid}) Ход из кэша gnubg не найден среди легальных, запись удалена.")
+            eval_cache.discard(pid, mid, bot_level)
+
+    if bot_turn_moves is None:
+        bot_turn_moves = _ask_gnubg(board, dice, bot_sign, pid, mid, legal_turns, tid)
+        if eval_cache is not None:
+            eval_cache.put(pid, mid, bot_level, bot_turn_moves)
+    else:
+        print(f"--- [GnuBGService] ({tid}) Ход взят из кэша решений gnubg.")
+
+    bot_turn_moves = sequence_to_dicts(bot_turn_moves)
+
     print(f"--- [GnuBGService] ({tid}) УСПЕХ! GnuBG вернул ход: {bot_turn_moves}")
     
     return bot_turn_moves
\ No newline at end of file
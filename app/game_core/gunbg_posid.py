@@ -8,7 +8,7 @@ def get_position_id(board, player_on_roll):
     Кодирует состояние доски (массив board) в 14-символьный Position ID.
 
     Аргументы:
-    board -- list[int]: 28-элементный массив состояния игры.
+    board -- list[int] или Board: 28-элементный массив состояния игры.
         board[0]:   Сброс Белых (Не используется для ID)
         board[1..24]: Точки
         board[25]:  Бар Белых (Игрок +1)
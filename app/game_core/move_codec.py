@@ -0,0 +1,56 @@
+# app/game_core/move_codec.py
+"""
+Компактная кодировка шага внутри game_core: одно число from * 32 + to.
+
+Индексы доски < 32, поэтому шаг помещается в 10 бит. Такие шаги сравниваются
+и хэшируются как обычные int, а сортировка чисел совпадает с сортировкой
+по (from, to). Словари {'from', 'to'} создаются только на выходе из
+game_core (possible_turns для сервисов и клиента).
+"""
+
+from typing import Iterable, List, Tuple
+
+MOVE_BITS = 5
+TO_MASK = (1 << MOVE_BITS) - 1
+BOARD_CELLS = 28 # индексы доски 0..27 (board_state.BOARD_SIZE)
+
+
+def pack_move(fr: int, to: int) -> int:
+    return (fr << MOVE_BITS) | to
+
+
+def unpack_move(move: int) -> Tuple[int, int]:
+    return move >> MOVE_BITS, move & TO_MASK
+
+
+def move_to_dict(move: int) -> dict:
+    return {'from': move >> MOVE_BITS, 'to': move & TO_MASK}
+
+
+def is_valid_step(step) -> bool:
+    """
+    Шаг от клиента можно упаковать: словарь с целыми from/to в пределах доски.
+    Иначе (например, to = 41) упакованное число совпало бы с другим шагом.
+    """
+    if not isinstance(step, dict):
+        return False
+    fr, to = step.get('from'), step.get('to')
+    return (
+        isinstance(fr, int) and not isinstance(fr, bool) and 0 <= fr < BOARD_CELLS
+        and isinstance(to, int) and not isinstance(to, bool) and 0 <= to < BOARD_CELLS
+    )
+
+
+def dict_to_move(step: dict) -> int:
+    """Упакованный шаг; ValueError, если шаг не проходит is_valid_step."""
+    if not is_valid_step(step):
+        raise ValueError(f"Недопустимый шаг: {step!r}")
+    return (step['from'] << MOVE_BITS) | step['to']
+
+
+def sequence_to_dicts(sequence: Iterable[int]) -> List[dict]:
+    return [{'from': move >> MOVE_BITS, 'to': move & TO_MASK} for move in sequence]
+
+
+def sequence_from_dicts(sequence: Iterable[dict]) -> Tuple[int, ...]:
+    return tuple((step['from'] << MOVE_BITS) | step['to'] for step in sequence)
@@ -1,66 +1,267 @@
 # app/game_core/move_generator.py
 
-from collections import deque
 from . import constants as c
 from . import board_state as board
+from . import canonical
+from .move_codec import MOVE_BITS, TO_MASK, pack_move, move_to_dict
+from .turn_cache import LRUCache
+from .move_tree import MoveNode, MoveTree
+
+# Кэш результатов генерации: (каноническая позиция, кубики) -> список ходов.
+# Одни и те же позиции (дебют, типовой выброс) повторяются во множестве игр.
+# Ходы внутри кэшей и перебора - упакованные шаги (move_codec), словари
+# {'from', 'to'} строятся только на выходе из модуля.
+_turns_cache = LRUCache()
+_trees_cache = LRUCache()
+
+# Кто выполняет перебор при промахе кэша: runner(fn, work_board, dice, *args).
+# None - прямо в вызывающем потоке (см. move_offload.configure_move_offload).
+_generation_runner = None
 
 def get_all_possible_turns(board_state, dice, player_sign):
     """
     Главная функция, которая находит ВСЕ легальные ПОЛНЫЕ последовательности ходов,
     корректно обрабатывая все правила коротких нард.
+
+    Перестановки, приводящие к одной и той же позиции, схлопываются:
+    для каждого легального первого шага возвращается по одной
+    последовательности на каждую достижимую итоговую позицию.
+
+    Результат берется из LRU-кэша, если эта позиция уже считалась.
+    Кэш хранит ходы в канонической системе (ходят белые), поэтому
+    зеркальные позиции черных и белых делят одну запись.
+    """
+    return canonical.packed_turns_to_dicts(_cached_canonical_turns(board_state, dice, player_sign), player_sign)
+
+
+def get_packed_turns(board_state, dice, player_sign):
+    """
+    То же, что get_all_possible_turns, но последовательности - кортежи
+    упакованных шагов (move_codec) в системе индексов player_sign.
+    """
+    canonical_turns = _cached_canonical_turns(board_state, dice, player_sign)
+    if player_sign == c.PLAYER_WHITE:
+        return list(canonical_turns)
+    return [canonical.from_canonical_packed(sequence, player_sign) for sequence in canonical_turns]
+
+
+def _cached_canonical_turns(board_state, dice, player_sign):
+    """Кортеж канонических упакованных последовательностей (из кэша или перебором)."""
+    work_board = canonical.canonical_board(board_state, player_sign)
+    cache_key = (work_board.key(), tuple(sorted(dice)))
+
+    canonical_turns = _turns_cache.get(cache_key)
+    if canonical_turns is None:
+        canonical_turns = tuple(_run_generation(_generate_all_possible_turns, work_board, dice, c.PLAYER_WHITE))
+        _turns_cache.put(cache_key, canonical_turns)
+    return canonical_turns
+
+
+def get_move_tree(board_state, dice, player_sign):
+    """
+    То же множество легальных ходов, что и get_all_possible_turns,
+    но в виде дерева (MoveTree): проверка шага - поиск в словаре,
+    а после шага достаточно спуститься на уровень ниже.
+    Узлы дерева общие для всех вызовов (кэш) - не изменяйте их.
+    """
+    work_board = canonical.canonical_board(board_state, player_sign)
+    cache_key = (work_board.key(), tuple(sorted(dice)))
+
+    root = _trees_cache.get(cache_key)
+    if root is None:
+        root = _run_generation(_build_move_tree, work_board, dice, c.PLAYER_WHITE)
+        _trees_cache.put(cache_key, root)
+
+    return MoveTree(root, player_sign)
+
+
+def set_generation_runner(runner):
+    """
+    Задает исполнителя перебора при промахе кэша (None - в текущем потоке).
+    Исполнитель получает чистую функцию и ее аргументы: рабочая доска
+    принадлежит только этому вызову, кэши трогает лишь вызывающий поток.
+    """
+    global _generation_runner
+    _generation_runner = runner
+
+
+def _run_generation(fn, work_board, dice, *args):
+    runner = _generation_runner
+    if runner is None:
+        return fn(work_board, dice, *args)
+    return runner(fn, work_board, dice, *args)
+
+
+def has_legal_move(board_state, dice, player_sign):
+    """
+    Есть ли у игрока хоть один легальный ход (без генерации последовательностей).
+    Ход существует тогда и только тогда, когда есть одиночный шаг хотя бы
+    одним кубиком, поэтому хватает проверок по таблицам с ранним выходом.
+    """
+    for die in set(dice):
+        if _has_single_move(board_state, die, player_sign):
+            return True
+    return False
+
+
+def _has_single_move(board_state, die, player_sign):
+    """Есть ли одиночный ход кубиком die (то же условие, что в _single_moves)."""
+    player_bar = board.get_bar_pos(player_sign)
+    if board_state[player_bar] * player_sign > 0:
+        return board_state[_BAR_ENTRY[player_sign][die]] * player_sign >= -1
+
+    is_all_home = None
+    for fr, to, _, is_bear_off, is_exact in _MOVE_TABLE[player_sign][die]:
+        if board_state[fr] * player_sign <= 0:
+            continue
+
+        if not is_bear_off:
+            if board_state[to] * player_sign >= -1:
+                return True
+            continue
+
+        # Условие выброса считаем только когда дошли до кандидата
+        if is_all_home is None:
+            if isinstance(board_state, board.Board):
+                is_all_home = board_state.is_all_home(player_sign)
+            else:
+                outer_board_range = board.get_outer_board_range(player_sign)
+                is_all_home = all(board_state[i] * player_sign <= 0 for i in outer_board_range)
+        if is_all_home and (is_exact or fr == _furthest_home_point(board_state, player_sign)):
+            return True
+
+    return False
+
+
+# Все 21 различный бросок: (больший кубик, меньший кубик)
+ALL_ROLLS = tuple((high, low) for high in range(6, 0, -1) for low in range(high, 0, -1))
+
+
+def get_turns_for_all_rolls(board_state, player_sign):
+    """
+    Легальные ходы для каждого из 21 броска: {(высокий, низкий): possible_turns}.
+    Деревья всех бросков строятся за один проход: списки одиночных ходов
+    для промежуточных досок общие для бросков с общим кубиком.
+    Результаты попадают в кэш деревьев, поэтому последующий get_move_tree
+    для реального броска (например, в roll_dice_for_player) - попадание в кэш.
+    """
+    work_board = canonical.canonical_board(board_state, player_sign)
+    board_key = work_board.key()
+    single_moves_cache = {}
+    result = {}
+
+    for roll in ALL_ROLLS:
+        high, low = roll
+        dice = [high] * 4 if high == low else [high, low]
+        cache_key = (board_key, tuple(sorted(dice)))
+
+        root = _trees_cache.get(cache_key)
+        if root is None:
+            root = _run_generation(_build_move_tree, work_board, dice, c.PLAYER_WHITE, single_moves_cache)
+            _trees_cache.put(cache_key, root)
+
+        result[roll] = MoveTree(root, player_sign).turns()
+
+    return result
+
+
+def configure_turns_cache(max_size, ttl):
+    """Задает размер и время жизни (сек.) кэша ходов. max_size=0 отключает кэш."""
+    _turns_cache.configure(max_size, ttl)
+    _trees_cache.configure(max_size, ttl)
+
+
+def get_turns_cache_stats():
+    """Счетчики кэша ходов: размер, попадания, промахи, вытеснения."""
+    return _turns_cache.stats()
+
+
+def _generate_all_possible_turns(work_board, dice, player_sign):
+    """
+    Полный перебор без кэша. work_board - рабочая копия Board,
+    она изменяется во время поиска и восстанавливается в конце.
     """
-        
     all_terminal_paths = []
-    queue = deque([ ([], [], dice, board_state) ]) 
+    # Уже раскрытые промежуточные состояния: (первый шаг, хэш доски, оставшиеся кубики).
+    # Первый шаг входит в ключ, чтобы не потерять ни одного варианта начала хода.
+    # Zobrist-хэш доски ведется инкрементально в make_move/unmake_move.
+    visited = set()
 
-    while queue:
-        path_moves, path_dice, remaining_dice, current_board = queue.pop()
+    # Поиск идет по ОДНОЙ рабочей доске: ход применяется на месте (make_move)
+    # и откатывается при возврате (unmake_move). Путь хранится в стеках.
+    dice_values = sorted(set(dice))
+    remaining_counts = [0] * 7 # remaining_counts[die] - сколько раз кубик еще доступен
+    for die in dice:
+        remaining_counts[die] += 1
+    total_dice = len(dice)
+    path_moves = []
+    path_dice = []
 
-        possible_next_steps = []
-        # Находим все возможные *следующие* одиночные ходы
-        for die in set(remaining_dice):
-            single_moves = _get_single_moves(current_board, die, player_sign)
-            for move in single_moves:
-                possible_next_steps.append((die, move))
+    def search():
+        has_next_step = False
+
+        # Перебираем все возможные *следующие* одиночные ходы
+        for die in dice_values:
+            if not remaining_counts[die]:
+                continue
+
+            for move in _single_moves(work_board, die, player_sign):
+                has_next_step = True
+
+                fr, to = move >> MOVE_BITS, move & TO_MASK
+                was_blot = work_board.make_step(fr, to, player_sign)
+                remaining_counts[die] -= 1
+                path_moves.append(move)
+                path_dice.append(die)
+                depth = len(path_moves)
+
+                if depth < 3:
+                    # При общем первом шаге транспозиции возможны
+                    # только начиная с третьего шага.
+                    is_new_state = True
+                else:
+                    # Транспозиция: это состояние уже раскрыто другим порядком ходов.
+                    state_key = (path_moves[0], work_board.zobrist, tuple(remaining_counts))
+                    is_new_state = state_key not in visited
+                    if is_new_state:
+                        visited.add(state_key)
+
+                if is_new_state:
+                    if depth == total_dice:
+                        # Кубики кончились - терминальный узел без лишнего вызова.
+                        all_terminal_paths.append((tuple(path_moves), list(path_dice), work_board.zobrist))
+                    else:
+                        search()
 
-        if not possible_next_steps:
+                path_moves.pop()
+                path_dice.pop()
+                remaining_counts[die] += 1
+                work_board.unmake_step(fr, to, player_sign, was_blot)
+
+        if not has_next_step:
             # Это терминальный узел: ходов с этой доски нет.
-            # Сохраняем результат.
-            all_terminal_paths.append((path_moves, path_dice))
-            continue
+            # Сохраняем копию пути и итоговую доску.
+            all_terminal_paths.append((tuple(path_moves), list(path_dice), work_board.zobrist))
 
-        # Если ходы есть, добавляем их в очередь
-        for die, move in possible_next_steps:
-            new_board = board.apply_move_to_board(current_board, move, player_sign)
-            
-            # Копируем список и удаляем *один* использованный кубик
-            next_remaining_dice = list(remaining_dice)
-            next_remaining_dice.remove(die) 
-            
-            queue.append((
-                path_moves + [move], 
-                path_dice + [die], 
-                next_remaining_dice, 
-                new_board
-            ))
+    search()
 
     # --- Фильтрация результатов ---
     
     if not all_terminal_paths:
-        # Это может случиться, если `_get_single_moves` не нашел ходов 
+        # Это может случиться, если `_single_moves` не нашел ходов 
         # с самого начала.
         return []
 
     # 1. Правило "Сыграть максимум": Находим максимальную длину хода
-    max_len = max(len(moves) for moves, _ in all_terminal_paths)
+    max_len = max(len(moves) for moves, _, _ in all_terminal_paths)
 
     if max_len == 0:
         return [] # Ходов не было
 
     # 2. Отбираем только те пути, что имеют максимальную длину
     max_len_paths = [
-        (moves, dice_used) 
-        for moves, dice_used in all_terminal_paths 
+        (moves, dice_used, final_board) 
+        for moves, dice_used, final_board in all_terminal_paths 
         if len(moves) == max_len
     ]
 
@@ -78,91 +279,206 @@ def get_all_possible_turns(board_state, dice, player_sign):
         # (т.е. есть ли он среди ходов, которые мы нашли)
         higher_die_was_possible = any(
             higher_die in dice_used 
-            for _, dice_used in max_len_paths
+            for _, dice_used, _ in max_len_paths
         )
 
         if higher_die_was_possible:
             # Если ход большим кубиком был возможен, мы *обязаны*
             # вернуть только его.
-            final_moves = [
-                moves for moves, dice_used in max_len_paths 
+            max_len_paths = [
+                (moves, dice_used, final_board) 
+                for moves, dice_used, final_board in max_len_paths 
                 if dice_used[0] == higher_die
             ]
-        else:
-            # Если ход большим кубиком был невозможен,
-            # мы возвращаем ходы меньшим (которые мы и нашли).
-            final_moves = [moves for moves, _ in max_len_paths]
-        
-        return final_moves
+        # Если ход большим кубиком был невозможен,
+        # мы возвращаем ходы меньшим (которые мы и нашли).
 
     # Во всех остальных случаях (дубль, или оба хода сыграны)
     # просто возвращаем все ходы максимальной длины.
-    return [moves for moves, _ in max_len_paths]
+    return _collapse_transpositions(max_len_paths)
+
+
+def _build_move_tree(work_board, dice, player_sign, single_moves_cache=None):
+    """
+    Строит DAG ходов полным перебором. Узлы мемоизируются по состоянию
+    (хэш доски, оставшиеся кубики), затем в каждом узле остаются только
+    шаги, ведущие к ходу максимальной длины.
+    Ребра узлов - упакованные шаги (move_codec).
+    single_moves_cache - общий словарь (хэш доски, кубик) -> одиночные ходы
+    для нескольких вызовов подряд (см. get_turns_for_all_rolls).
+    """
+    dice_values = sorted(set(dice))
+    remaining_counts = [0] * 7
+    for die in dice:
+        remaining_counts[die] += 1
+    nodes = {}
+
+    def search():
+        state_key = (work_board.zobrist, tuple(remaining_counts))
+        node = nodes.get(state_key)
+        if node is not None:
+            return node
+        node = nodes[state_key] = MoveNode(work_board.zobrist)
+
+        children = {}
+        for die in dice_values:
+            if not remaining_counts[die]:
+                continue
+
+            if single_moves_cache is None:
+                single_moves = _single_moves(work_board, die, player_sign)
+            else:
+                moves_key = (work_board.zobrist, die)
+                single_moves = single_moves_cache.get(moves_key)
+                if single_moves is None:
+                    single_moves = single_moves_cache[moves_key] = _single_moves(work_board, die, player_sign)
+
+            for move in single_moves:
+                fr, to = move >> MOVE_BITS, move & TO_MASK
+                was_blot = work_board.make_step(fr, to, player_sign)
+                remaining_counts[die] -= 1
+                child = search()
+                remaining_counts[die] += 1
+                work_board.unmake_step(fr, to, player_sign, was_blot)
+
+                # Один и тот же шаг бывает возможен разными кубиками (выброс).
+                # Оставляем вариант с самым длинным продолжением, при равенстве -
+                # больший кубик (dice_values идут по возрастанию): это нужно
+                # для правила "Большего кубика" ниже.
+                previous = children.get(move)
+                if previous is None or child.height >= previous[2].height:
+                    children[move] = (die, was_blot, child)
+
+        if children:
+            node.height = 1 + max(child.height for _, _, child in children.values())
+            node.children = {
+                step: edge for step, edge in children.items()
+                if edge[2].height == node.height - 1
+            }
+        return node
+
+    root = search()
+
+    # Правило "Большего кубика" (см. _generate_all_possible_turns)
+    is_double = len(set(dice)) == 1
+    if not is_double and len(dice) == 2 and root.height == 1:
+        higher_die = max(dice)
+        higher_children = {
+            step: edge for step, edge in root.children.items() if edge[0] == higher_die
+        }
+        if higher_children:
+            root.children = higher_children
+
+    return root
+
+
+def _collapse_transpositions(paths):
+    """
+    Оставляет по одной последовательности на пару (первый шаг, итоговая доска).
+    Нужна для случаев, когда одна позиция достигается разными кубиками
+    (например, выброс с точки 3 шестеркой или пятеркой).
+    """
+    seen = set()
+    final_moves = []
+    for moves, _, final_board in paths:
+        key = (moves[0], final_board)
+        if key in seen:
+            continue
+        seen.add(key)
+        final_moves.append(moves)
+    return final_moves
+
+
+# --- Таблицы одиночных ходов (строятся один раз при импорте) ---
+
+def _build_move_table(player_sign):
+    """
+    Для каждого кубика: кортеж (from, to, упакованный шаг, is_bear_off, is_exact)
+    по всем точкам в порядке возрастания индекса. Для выброса to - позиция "дома".
+    """
+    table = [()]
+    for die in range(1, 7):
+        entries = []
+        for fr in range(c.POINT_1, c.POINT_24 + 1):
+            to = fr - die * player_sign
+            if c.POINT_1 <= to <= c.POINT_24:
+                entries.append((fr, to, pack_move(fr, to), False, False))
+            else:
+                exact = to == c.HOME_WHITE if player_sign == c.PLAYER_WHITE else to == c.POINT_24 + 1
+                home = board.get_home_pos(player_sign)
+                entries.append((fr, home, pack_move(fr, home), True, exact))
+        table.append(tuple(entries))
+    return tuple(table)
+
+
+def _build_bar_entry_table(player_sign):
+    """Для каждого кубика: точка входа с бара (белые: 25 - die, черные: die)."""
+    bar = board.get_bar_pos(player_sign)
+    return (None,) + tuple(bar - die if player_sign == c.PLAYER_WHITE else die for die in range(1, 7))
+
+
+def _build_bar_move_table(player_sign):
+    """Для каждого кубика: упакованный шаг с бара на точку входа."""
+    bar = board.get_bar_pos(player_sign)
+    entry = _build_bar_entry_table(player_sign)
+    return (None,) + tuple(pack_move(bar, entry[die]) for die in range(1, 7))
+
+
+_MOVE_TABLE = {sign: _build_move_table(sign) for sign in (c.PLAYER_WHITE, c.PLAYER_BLACK)}
+_BAR_ENTRY = {sign: _build_bar_entry_table(sign) for sign in (c.PLAYER_WHITE, c.PLAYER_BLACK)}
+_BAR_MOVE = {sign: _build_bar_move_table(sign) for sign in (c.PLAYER_WHITE, c.PLAYER_BLACK)}
+# Точки дома от самой дальней к ближней: первая занятая - "самая дальняя фишка"
+_HOME_FROM_FURTHEST = {
+    c.PLAYER_WHITE: tuple(reversed(c.HOME_BOARD_WHITE)),
+    c.PLAYER_BLACK: tuple(c.HOME_BOARD_BLACK),
+}
+
 
+def _furthest_home_point(board_state, player_sign):
+    """
+    Самая дальняя занятая точка дома. Вызывается, только когда все фишки
+    в доме, поэтому достаточно просмотреть 6 точек.
+    """
+    for point in _HOME_FROM_FURTHEST[player_sign]:
+        if board_state[point] * player_sign > 0:
+            return point
+    return None
 
-# --- Вспомогательная функция (Ваша, без изменений) ---
 
 def _get_single_moves(board_state, die, player_sign):
     """Вспомогательная функция для поиска одиночных ходов для одного кубика."""
+    return [move_to_dict(move) for move in _single_moves(board_state, die, player_sign)]
+
+
+def _single_moves(board_state, die, player_sign):
+    """Одиночные ходы одним кубиком: список упакованных шагов (move_codec)."""
     moves = []
     player_bar = board.get_bar_pos(player_sign)
-    
+
     if board_state[player_bar] * player_sign > 0:
-                
-        if player_sign == c.PLAYER_WHITE:
-            to_point = c.BAR_WHITE - die # (e.g., 25 - 6 = 19)
-        else:
-            # Для черных (sign -1) ход с бара (27) идет на 'die'
-            # (e.g., die 6 -> point 6)
-            to_point = die
-
-        if board_state[to_point] * player_sign >= -1:
-            moves.append({'from': player_bar, 'to': to_point})
+        if board_state[_BAR_ENTRY[player_sign][die]] * player_sign >= -1:
+            moves.append(_BAR_MOVE[player_sign][die])
         return moves # Если на баре, других ходов нет
 
-    # 2. Проверяем ходы по доске
-    possible_starts = [i for i, count in enumerate(board_state[c.POINT_1:c.POINT_24+1], 1) if count * player_sign > 0]
-    
-    # 3. Проверяем возможность выброса (Bear off)
-    outer_board_range = board.get_outer_board_range(player_sign)
-    is_all_home = all(board_state[i] * player_sign <= 0 for i in outer_board_range)
+    if isinstance(board_state, board.Board):
+        is_all_home = board_state.is_all_home(player_sign)
+    else:
+        outer_board_range = board.get_outer_board_range(player_sign)
+        is_all_home = all(board_state[i] * player_sign <= 0 for i in outer_board_range)
 
-    bear_off_pos = board.get_home_pos(player_sign)
+    furthest = _furthest_home_point(board_state, player_sign) if is_all_home else None
 
-    for fr in possible_starts:
-        to = fr - (die * player_sign) # (Белые: 24 -> 18, Черные: 1 -> 7)
-        
-        # 3.1 Обычный ход
-        if c.POINT_1 <= to <= c.POINT_24 and board_state[to] * player_sign >= -1:
-            moves.append({'from': fr, 'to': to})
-        
-        # 3.2 Ход на выброс (Bear off)
-        elif is_all_home:
-            is_white_bear_off = (player_sign == c.PLAYER_WHITE and to <= c.HOME_WHITE)
-            is_black_bear_off = (player_sign == c.PLAYER_BLACK and to > c.POINT_24)
-
-            if is_white_bear_off or is_black_bear_off:
-                # Проверяем, точный ли это ход
-                is_exact = (player_sign == c.PLAYER_WHITE and fr == die) or \
-                           (player_sign == c.PLAYER_BLACK and fr == (c.POINT_24 - die + 1)) # (24, 23, ...)
-
-                if is_exact:
-                    moves.append({'from': fr, 'to': bear_off_pos})
-                    continue # Точный ход всегда имеет приоритет (хотя здесь не обязательно)
-
-                # Проверяем, самая ли это дальняя фишка
-                is_furthest = True
-                if player_sign == c.PLAYER_WHITE:
-                    search_range = range(fr + 1, c.POINT_24 + 1) # Ищем фишки "дальше" (на больших индексах)
-                else:
-                    search_range = range(c.POINT_1, fr) # Ищем фишки "дальше" (на меньших индексах)
-
-                for i in search_range:
-                    if board_state[i] * player_sign > 0:
-                        is_furthest = False
-                        break
-                
-                if is_furthest:
-                    moves.append({'from': fr, 'to': bear_off_pos})
-                    
-    return moves
\ No newline at end of file
+    for fr, to, move, is_bear_off, is_exact in _MOVE_TABLE[player_sign][die]:
+        if board_state[fr] * player_sign <= 0:
+            continue
+
+        if not is_bear_off:
+            # Обычный ход: точка не закрыта соперником
+            if board_state[to] * player_sign >= -1:
+                moves.append(move)
+
+        # Выброс: все фишки дома, ход точный или с самой дальней фишки
+        elif is_all_home and (is_exact or fr == furthest):
+            moves.append(move)
+
+    return moves
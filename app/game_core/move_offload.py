@@ -0,0 +1,188 @@
+# app/game_core/move_offload.py
+"""
+Генерация ходов вне хаба eventlet.
+
+run.py делает eventlet.monkey_patch(), поэтому обработчики сокетов и потоки
+пулов - это green-потоки одного системного потока (хаба). Перебор ходов -
+чистая работа CPU: пока он идет, хаб не обслуживает ни одного клиента.
+Здесь промахи кэша move_generator с дорогой оценкой перебора уходят
+в настоящий системный поток (eventlet.tpool), а хаб тем временем обслуживает
+остальных. Дешевые позиции считаются на месте: передача в другой поток
+дороже них.
+
+Пул процессов (ProcessPoolExecutor) здесь не используется: под monkey_patch
+его служебные потоки становятся green-потоками, и ожидание результата зависает.
+
+HubStallMonitor - green-поток, который засыпает на короткий интервал
+и меряет, насколько проспал дольше запрошенного. Это время, на которое
+хаб был занят чужой работой (метрика "hub stall").
+Счетчики отдает get_offload_stats() и маршрут GET /status.
+"""
+
+import time
+import logging
+import threading
+from typing import Optional
+
+from . import constants as c
+from .move_generator import set_generation_runner
+
+logger = logging.getLogger(__name__)
+
+MODE_INLINE = 'inline'
+MODE_THREAD = 'thread'
+MODES = (MODE_INLINE, MODE_THREAD)
+
+# Оценка (точки с фишками) ** (число кубиков): 8 точек и дубль = 4096.
+# Ниже порога медианный перебор занимает около миллисекунды.
+DEFAULT_COST_THRESHOLD = 4096
+DEFAULT_STALL_INTERVAL = 0.5 # сек.
+DEFAULT_STALL_WARN_MS = 100.0
+
+_settings = {
+    'mode': MODE_INLINE,
+    'cost_threshold': DEFAULT_COST_THRESHOLD,
+}
+_stats_lock = threading.Lock()
+_stats = {
+    'inline_calls': 0,
+    'inline_time_max': 0.0,
+    'offloaded_calls': 0,
+    'offloaded_time_total': 0.0,
+    'hub_stall_count': 0,
+    'hub_stall_total': 0.0,
+    'hub_stall_max': 0.0,
+}
+
+
+def _hub_is_patched() -> bool:
+    """Работаем ли под eventlet.monkey_patch (есть ли общий хаб, который можно занять)."""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+def run_off_hub(fn, *args):
+    """
+    Блокирующий вызов (например, sqlite3) вне хаба: под monkey_patch -
+    в системном потоке eventlet.tpool, иначе на месте. Исключения fn
+    пробрасываются вызывающему.
+    """
+    if not _hub_is_patched():
+        return fn(*args)
+    from eventlet import tpool
+    return tpool.execute(fn, *args)
+
+
+def estimate_generation_cost(work_board, dice) -> int:
+    """
+    Грубая оценка размера перебора для канонической доски (ходят белые):
+    (число точек с фишками, включая бар) ** (число кубиков).
+    """
+    sources = sum(1 for i in range(c.POINT_1, c.BAR_WHITE + 1) if work_board[i] > 0)
+    return sources ** len(dice)
+
+
+def _run_offloaded(fn, work_board, dice, *args):
+    """Исполнитель для move_generator.set_generation_runner."""
+    started = time.perf_counter()
+    if estimate_generation_cost(work_board, dice) < _settings['cost_threshold']:
+        result = fn(work_board, dice, *args)
+        elapsed = time.perf_counter() - started
+        with _stats_lock:
+            _stats['inline_calls'] += 1
+            _stats['inline_time_max'] = max(_stats['inline_time_max'], elapsed)
+        return result
+
+    # Вызывающий green-поток ждет результата, хаб в это время свободен
+    from eventlet import tpool
+    result = tpool.execute(fn, work_board, dice, *args)
+
+    elapsed = time.perf_counter() - started
+    with _stats_lock:
+        _stats['offloaded_calls'] += 1
+        _stats['offloaded_time_total'] += elapsed
+    return result
+
+
+def configure_move_offload(mode: str, cost_threshold: int):
+    """
+    Режим генерации ходов при промахе кэша:
+    'inline' - в вызывающем потоке (как раньше),
+    'thread' - позиции с оценкой от cost_threshold в системном потоке eventlet.tpool.
+    Без monkey_patch (нет общего хаба) генерация всегда идет на месте.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим генерации ходов: {mode!r} (допустимо: {', '.join(MODES)})")
+
+    if mode != MODE_INLINE and not _hub_is_patched():
+        logger.info(f"Режим генерации '{mode}' не нужен без eventlet.monkey_patch, генерация на месте.")
+        mode = MODE_INLINE
+
+    _settings.update(mode=mode, cost_threshold=cost_threshold)
+    set_generation_runner(None if mode == MODE_INLINE else _run_offloaded)
+    logger.info(f"Генерация ходов: режим '{mode}', порог стоимости {cost_threshold}.")
+
+
+class HubStallMonitor:
+    """
+    Меряет задержки хаба: green-поток спит interval секунд, и все, что
+    он проспал сверх этого, - время, когда хаб был занят. Задержки дольше
+    warn_ms пишутся в лог, сводка - в get_offload_stats().
+    """
+
+    def __init__(self, interval: float = DEFAULT_STALL_INTERVAL, warn_ms: float = DEFAULT_STALL_WARN_MS):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self._stopped = threading.Event()
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="HubStallMonitor", daemon=True)
+        thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            time.sleep(self.interval)
+            stall = time.monotonic() - started - self.interval
+            if stall <= 0:
+                continue
+
+            with _stats_lock:
+                _stats['hub_stall_total'] += stall
+                _stats['hub_stall_max'] = max(_stats['hub_stall_max'], stall)
+                if stall * 1000 >= self.warn_ms:
+                    _stats['hub_stall_count'] += 1
+            if stall * 1000 >= self.warn_ms:
+                logger.warning(f"[HubStall] Хаб eventlet был занят {stall * 1000:.0f} мс.")
+
+
+_monitor: Optional[HubStallMonitor] = None
+
+
+def start_hub_stall_monitor(interval: float, warn_ms: float):
+    """Запускает монитор задержек хаба (только под monkey_patch; interval <= 0 - выключен)."""
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
+    if interval <= 0 or not _hub_is_patched():
+        return
+    _monitor = HubStallMonitor(interval, warn_ms)
+    _monitor.start()
+
+
+def get_offload_stats() -> dict:
+    """
+    Счетчики: генерации на месте и вне хаба, время генерации,
+    задержки хаба (число задержек дольше порога, суммарное и максимальное время, сек.).
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['mode'] = _settings['mode']
+    return stats
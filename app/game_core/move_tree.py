@@ -0,0 +1,222 @@
+# app/game_core/move_tree.py
+"""
+Дерево ходов (trie) - альтернативное представление possible_turns.
+
+Узел соответствует состоянию "доска + оставшиеся кубики", ребро - одиночному
+шагу (упакованный from * 32 + to, см. move_codec) с использованным кубиком и признаком сбитого блота.
+Одинаковые состояния, достигнутые разными порядками шагов, - это один и тот же
+узел, поэтому структура на самом деле является DAG и остается компактной даже
+для дублей. В дереве оставлены только шаги, ведущие к ходу максимальной длины,
+так что любой путь от корня до листа - легальный полный ход.
+
+Деревья строятся в канонической системе (ходят белые) и кэшируются;
+MoveTree переводит шаги в систему индексов игрока на лету.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from . import constants as c
+from .canonical import MIRROR_MOVE, canonical_board, packed_turns_to_dicts
+from .move_codec import MOVE_BITS, TO_MASK, dict_to_move, is_valid_step, move_to_dict
+
+Step = int
+
+# Формат possible_turns в payload для клиента (см. configure_move_tree_payload)
+_payload_settings = {'send_tree': False}
+
+
+class MoveNode:
+    """
+    Узел дерева ходов.
+    children: упакованный шаг -> (кубик, был ли блот, дочерний узел).
+    height: сколько шагов еще можно сделать из этого узла.
+    position: Zobrist-хэш доски в узле (для склейки одинаковых итогов).
+    """
+    __slots__ = ('children', 'height', 'position')
+
+    def __init__(self, position: int):
+        self.children: Dict[Step, Tuple[int, bool, 'MoveNode']] = {}
+        self.height = 0
+        self.position = position
+
+
+class MoveTree:
+    """Дерево ходов с точки зрения конкретного игрока (player_sign)."""
+    __slots__ = ('root', 'player_sign', '_step_index', '_final_index')
+
+    def __init__(self, root: MoveNode, player_sign: int):
+        self.root = root
+        self.player_sign = player_sign
+        self._step_index: Optional[Dict[Step, Tuple[int, bool]]] = None
+        self._final_index: Optional[Dict[int, Tuple[Step, ...]]] = None
+
+    def _to_canonical(self, step: dict) -> Optional[Step]:
+        """Упакованный канонический шаг или None, если шаг вне доски."""
+        if not is_valid_step(step):
+            return None
+        move = dict_to_move(step)
+        if self.player_sign == c.PLAYER_WHITE:
+            return move
+        return MIRROR_MOVE[move]
+
+    def _from_canonical(self, move: Step) -> Step:
+        if self.player_sign == c.PLAYER_WHITE:
+            return move
+        return MIRROR_MOVE[move]
+
+    def __bool__(self):
+        return bool(self.root.children)
+
+    def step_index(self) -> Dict[Step, Tuple[int, bool]]:
+        """
+        Индекс первых шагов в системе игрока: упакованный шаг -> (кубик, был ли блот).
+        Строится один раз на дерево (то есть на бросок или принятый шаг).
+        """
+        if self._step_index is None:
+            self._step_index = {
+                self._from_canonical(move): (die, was_blot)
+                for move, (die, was_blot, _) in self.root.children.items()
+            }
+        return self._step_index
+
+    def lookup(self, step: dict) -> Optional[Tuple[int, bool]]:
+        """(кубик, был ли блот) для легального шага или None. O(1)."""
+        if not is_valid_step(step):
+            return None
+        return self.step_index().get(dict_to_move(step))
+
+    def descend(self, step: dict) -> Optional['MoveTree']:
+        """Поддерево оставшихся шагов после step (или None, если шаг нелегален)."""
+        move = self._to_canonical(step)
+        if move is None:
+            return None
+        edge = self.root.children.get(move)
+        if edge is None:
+            return None
+        return MoveTree(edge[2], self.player_sign)
+
+    def first_steps(self) -> List[dict]:
+        return [move_to_dict(self._from_canonical(move)) for move in self.root.children]
+
+    def turns(self) -> list:
+        """
+        Плоский список possible_turns в прежнем формате: для каждого первого
+        шага - по одной последовательности на каждую итоговую позицию.
+        """
+        sequences = []
+        for first_step, (_, _, child) in self.root.children.items():
+            seen_nodes = set()
+            seen_positions = set()
+            path = [first_step]
+
+            def collect(node):
+                if not node.children:
+                    if node.position not in seen_positions:
+                        seen_positions.add(node.position)
+                        sequences.append(tuple(path))
+                    return
+                for step, (_, _, next_node) in node.children.items():
+                    # Все листья уже раскрытого узла уже собраны
+                    if id(next_node) in seen_nodes:
+                        continue
+                    seen_nodes.add(id(next_node))
+                    path.append(step)
+                    collect(next_node)
+                    path.pop()
+
+            collect(child)
+
+        return packed_turns_to_dicts(sequences, self.player_sign)
+
+    def final_index(self) -> Dict[int, Tuple[Step, ...]]:
+        """
+        Итоговые позиции полных ходов: Zobrist-хэш канонической доски ->
+        одна упакованная каноническая последовательность, ведущая к ней.
+        Строится один раз на дерево.
+        """
+        if self._final_index is None:
+            index = {}
+            seen_nodes = set()
+            path = []
+
+            def collect(node):
+                if not node.children:
+                    index.setdefault(node.position, tuple(path))
+                    return
+                for step, (_, _, child) in node.children.items():
+                    if id(child) in seen_nodes:
+                        continue
+                    seen_nodes.add(id(child))
+                    path.append(step)
+                    collect(child)
+                    path.pop()
+
+            if self.root.children:
+                collect(self.root)
+            self._final_index = index
+        return self._final_index
+
+    def match_final(self, final_board) -> Optional[List[dict]]:
+        """
+        Легальный полный ход (в системе игрока), приводящий к final_board,
+        или None. Проверка - один поиск по хэшу итоговой позиции.
+        """
+        sequence = self.final_index().get(canonical_board(final_board, self.player_sign).zobrist)
+        if sequence is None:
+            return None
+        return [move_to_dict(self._from_canonical(move)) for move in sequence]
+
+    def full_turn_edges(self, steps: List[dict]) -> Optional[List[Tuple[int, bool]]]:
+        """
+        (кубик, был ли блот) для каждого шага, если steps - полный путь
+        от корня до листа, иначе None.
+        """
+        edges = []
+        node = self.root
+        for step in steps:
+            move = self._to_canonical(step)
+            edge = node.children.get(move) if move is not None else None
+            if edge is None:
+                return None
+            edges.append((edge[0], edge[1]))
+            node = edge[2]
+        return edges if not node.children else None
+
+    def to_payload(self) -> dict:
+        """
+        Компактное представление для клиента: список узлов, корень - узел 0.
+        Каждый узел - список ребер [from, to, кубик, индекс дочернего узла].
+        Общие узлы DAG передаются один раз.
+        """
+        index: Dict[int, int] = {}
+        nodes: List[list] = []
+
+        def visit(node) -> int:
+            node_id = index.get(id(node))
+            if node_id is not None:
+                return node_id
+            node_id = index[id(node)] = len(nodes)
+            edges = []
+            nodes.append(edges)
+            for move, (die, _, child) in node.children.items():
+                step = self._from_canonical(move)
+                edges.append([step >> MOVE_BITS, step & TO_MASK, die, visit(child)])
+            return node_id
+
+        visit(self.root)
+        return {'nodes': nodes}
+
+
+def configure_move_tree_payload(send_tree: bool):
+    """Включает отправку клиенту дерева ходов вместо плоского списка."""
+    _payload_settings['send_tree'] = bool(send_tree)
+
+
+def turns_payload(possible_turns: list, move_tree: Optional[MoveTree]) -> dict:
+    """
+    Часть payload с доступными ходами: {'possible_turns': [...]} или,
+    если включено и дерево есть, {'move_tree': {...}}.
+    """
+    if _payload_settings['send_tree'] and move_tree is not None:
+        return {'move_tree': move_tree.to_payload()}
+    return {'possible_turns': possible_turns}
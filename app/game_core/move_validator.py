@@ -3,10 +3,18 @@
 from . import constants as c
 from . import move_generator
 
-def get_move_details(board, dice, player_sign, step, possible_turns):
+def get_move_details(board, dice, player_sign, step, possible_turns, move_tree=None):
     """
     Проверяет ход и возвращает (isValid, die_used, was_blot).
+    Если передано дерево ходов (MoveTree), проверка - один поиск в словаре.
     """
+
+    if move_tree is not None:
+        details = move_tree.lookup(step)
+        if details is None:
+            return False, None, False
+        die_used, was_blot = details
+        return True, die_used, was_blot
     
     is_valid = False
     for sequence in possible_turns:
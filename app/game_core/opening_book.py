@@ -0,0 +1,192 @@
+# app/game_core/opening_book.py
+"""
+Дебютная книга бота.
+
+Каждая PvE-партия начинается с create_initial_board_state, поэтому
+первые решения бота повторяются: 15 дебютных бросков (без дублей) и ответы
+на дебютные ходы соперника. Книга заранее строится через gnubg
+и хранится в компактном двоичном файле, который загружается при старте.
+Ход из книги не требует запроса к gnubg.
+
+Позиции хранятся в каноническом виде (ходят белые, см. canonical.py),
+поэтому одна запись годится для обоих цветов.
+
+Формат файла (little-endian):
+    заголовок: b'BGOB', версия (B), число записей (I)
+    запись:    ключ доски (28 байт), кубики hi, lo (B, B),
+               число шагов n (B), n упакованных шагов (H, move_codec)
+
+Сборка (нужен gnubg):
+    python -m app.game_core.opening_book
+    python -m app.game_core.opening_book --output path/to/book.bin
+"""
+
+import os
+import sys
+import struct
+import logging
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from . import constants as c
+from .board_state import BOARD_SIZE, create_initial_board_state, make_move
+from .canonical import canonical_board, from_canonical_packed
+from .gnubg_service import get_gnubg_turn, match_by_final_position
+from .move_codec import sequence_from_dicts, sequence_to_dicts
+from .move_generator import ALL_ROLLS, get_packed_turns
+
+logger = logging.getLogger(__name__)
+
+BOOK_FILE = os.path.join(os.path.dirname(__file__), 'data', 'opening_book.bin')
+
+_MAGIC = b'BGOB'
+_VERSION = 1
+_HEADER = struct.Struct('<4sBI')
+_ENTRY = struct.Struct(f'<{BOARD_SIZE}sBBB')
+_STEP = struct.Struct('<H')
+
+# (ключ канонической доски, (hi, lo)) -> канонический ход (упакованные шаги)
+BookKey = Tuple[bytes, Tuple[int, int]]
+
+_book: Dict[BookKey, Tuple[int, ...]] = {}
+
+
+def _roll_key(dice) -> Tuple[int, int]:
+    """Бросок без учета порядка кубиков; дубль [d, d, d, d] -> (d, d)."""
+    return max(dice[0], dice[1]), min(dice[0], dice[1])
+
+
+def _book_key(board, dice, player_sign) -> BookKey:
+    return canonical_board(board, player_sign).key(), _roll_key(dice)
+
+
+def _roll_dice(roll) -> List[int]:
+    high, low = roll
+    return [high] * 4 if high == low else [high, low]
+
+
+def encode_book(book: Dict[BookKey, Tuple[int, ...]]) -> bytes:
+    chunks = [_HEADER.pack(_MAGIC, _VERSION, len(book))]
+    for (key, (high, low)), moves in sorted(book.items()):
+        chunks.append(_ENTRY.pack(key, high, low, len(moves)))
+        chunks.extend(_STEP.pack(move) for move in moves)
+    return b''.join(chunks)
+
+
+def decode_book(data: bytes) -> Dict[BookKey, Tuple[int, ...]]:
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Неизвестный формат дебютной книги ({magic!r}, версия {version}).")
+
+    book = {}
+    offset = _HEADER.size
+    for _ in range(count):
+        key, high, low, n = _ENTRY.unpack_from(data, offset)
+        offset += _ENTRY.size
+        moves = struct.unpack_from(f'<{n}H', data, offset)
+        offset += n * _STEP.size
+        book[(key, (high, low))] = moves
+    return book
+
+
+def load_opening_book(path: Optional[str] = BOOK_FILE) -> int:
+    """
+    Загружает книгу (вызывается при старте). Нет файла или path=None -
+    книга пустая, все ходы считает gnubg. Возвращает число записей.
+    """
+    global _book
+    if not path or not os.path.exists(path):
+        _book = {}
+        logger.info(f"[OpeningBook] Дебютная книга не загружена (нет файла: {path}).")
+        return 0
+
+    try:
+        with open(path, 'rb') as f:
+            _book = decode_book(f.read())
+    except (OSError, ValueError, struct.error) as e:
+        _book = {}
+        logger.error(f"[OpeningBook] Не удалось прочитать дебютную книгу {path}: {e}")
+        return 0
+
+    logger.info(f"[OpeningBook] Загружена дебютная книга: {len(_book)} позиций ({path}).")
+    return len(_book)
+
+
+def lookup_opening_move(board, dice, player_sign) -> Optional[List[dict]]:
+    """
+    Ход из книги в системе player_sign (список словарей, как у gnubg_service)
+    или None, если позиции с этим броском в книге нет.
+    Ход из книги сверяется с легальными ходами по итоговой позиции.
+    """
+    if not _book or not dice:
+        return None
+
+    moves = _book.get(_book_key(board, dice, player_sign))
+    if moves is None:
+        return None
+
+    moves = from_canonical_packed(moves, player_sign)
+    legal_moves = match_by_final_position(board, moves, get_packed_turns(board, dice, player_sign), player_sign)
+    if legal_moves is None:
+        logger.error(f"[OpeningBook] Ход из книги {sequence_to_dicts(moves)} нелегален, позиция пропущена.")
+        return None
+    return sequence_to_dicts(legal_moves)
+
+
+def build_opening_book(choose_turn) -> Dict[BookKey, Tuple[int, ...]]:
+    """
+    Строит книгу: choose_turn(board, dice, sign) -> ход (список словарей).
+    Позиции: начальная с каждым дебютным броском и ответы соперника
+    (все 21 бросок) на выбранный дебютный ход.
+    """
+    book = {}
+
+    def add(board, dice, sign):
+        turn = choose_turn(board, dice, sign)
+        if not turn:
+            return None
+        # Зеркальное отражение - инволюция: тот же вызов переводит ход в каноническую систему
+        book[_book_key(board, dice, sign)] = from_canonical_packed(sequence_from_dicts(turn), sign)
+        return turn
+
+    initial = create_initial_board_state()
+    sign = c.PLAYER_WHITE
+    for roll in ALL_ROLLS:
+        if roll[0] == roll[1]:
+            continue
+        dice = _roll_dice(roll)
+        opening_turn = add(initial, dice, sign)
+        if opening_turn is None:
+            continue
+
+        after_opening = initial.copy()
+        for move in opening_turn:
+            make_move(after_opening, move, sign)
+        for reply in ALL_ROLLS:
+            add(after_opening, _roll_dice(reply), -sign)
+        logger.info(f"[OpeningBook] Дебют {roll}: {len(book)} позиций в книге.")
+
+    return book
+
+
+def save_opening_book(book, path: str = BOOK_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(encode_book(book))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сборка дебютной книги бота через gnubg")
+    parser.add_argument('--output', default=BOOK_FILE, help="путь к файлу книги")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    book = build_opening_book(get_gnubg_turn)
+    save_opening_book(book, args.output)
+    print(f"Дебютная книга: {len(book)} позиций, {os.path.getsize(args.output)} байт -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+# app/game_core/perft.py
+"""
+Perft для генератора ходов: бенчмарк и проверка корректности.
+
+Для набора позиций (дебют, все броски, блиц с фишками на баре, прайм против
+прайма, дубли в миттельшпиле, выброс) перебираются все 21 различный бросок
+на заданную глубину (полуходы, стороны чередуются) и считаются:
+  leaves    - число листьев: различные итоговые позиции каждого броска
+              в каждом узле, с кратностью узла (пропуск хода - один лист),
+  positions - число различных итоговых позиций (доска + сторона на ходу),
+  digest    - контрольная сумма множества итоговых позиций.
+Каждый бросок учитывается один раз, без весов 1/36 и 2/36.
+
+Листья считаются по итоговым позициям, а не по последовательностям шагов:
+сколько записей одного хода оставляет склейка перестановок
+(_collapse_transpositions) - выбор представления, а не правило игры,
+и эталон от него не зависит.
+
+Эталонные значения лежат в data/perft_golden.json. Любое изменение
+move_generator / board_state, меняющее множество ходов, дает расхождение.
+Глубина 1 всех позиций сверяется с эталоном и в pytest (tests/test_perft.py).
+
+Запуск:
+    python -m app.game_core.perft            # проверка + скорость
+    python -m app.game_core.perft --update   # перезаписать эталон
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from . import constants as c
+from .board_state import Board, BOARD_SIZE, create_initial_board_state, make_move
+from .move_generator import ALL_ROLLS, get_all_possible_turns, configure_turns_cache
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), 'data', 'perft_golden.json')
+
+
+def _position(white, black):
+    """
+    Доска из расстановок {точка: число фишек} для каждой стороны.
+    Точки - индексы доски (бар белых 25, бар черных 27), числа положительные.
+    Недостающие до 15 фишки считаются выброшенными.
+    """
+    cells = [0] * BOARD_SIZE
+    for point, count in white.items():
+        cells[point] += count
+    for point, count in black.items():
+        cells[point] -= count
+    cells[c.HOME_WHITE] += 15 - sum(white.values())
+    cells[c.HOME_BLACK] -= 15 - sum(black.values())
+    return Board(cells)
+
+
+def _roll_dice(roll):
+    high, low = roll
+    return [high] * 4 if high == low else [high, low]
+
+
+_DOUBLES = tuple(roll for roll in ALL_ROLLS if roll[0] == roll[1])
+
+# (имя, доска, сторона на ходу, глубина, броски: None - все 21)
+POSITIONS = [
+    ('opening', create_initial_board_state(), c.PLAYER_WHITE, 2, None),
+    ('opening_black', create_initial_board_state(), c.PLAYER_BLACK, 1, None),
+    # Две фишки на баре, у черных закрыты 19-23: входит только единица
+    ('blitz_two_on_bar', _position(
+        {25: 2, 24: 1, 13: 5, 8: 3, 6: 4},
+        {19: 3, 20: 3, 21: 2, 22: 2, 23: 2, 12: 3},
+    ), c.PLAYER_WHITE, 2, None),
+    # Фишка на баре против закрытого дома: пропуск хода при любом броске
+    ('blitz_closed_board', _position(
+        {25: 1, 13: 5, 8: 4, 6: 5},
+        {19: 2, 20: 2, 21: 2, 22: 3, 23: 3, 24: 3},
+    ), c.PLAYER_WHITE, 1, None),
+    ('prime_vs_prime', _position(
+        {4: 2, 5: 2, 6: 2, 7: 2, 8: 2, 9: 2, 22: 2, 23: 1},
+        {16: 2, 17: 2, 18: 2, 19: 2, 20: 2, 21: 2, 3: 2, 2: 1},
+    ), c.PLAYER_WHITE, 1, None),
+    ('midgame_doubles', _position(
+        {24: 1, 18: 2, 13: 3, 10: 2, 8: 2, 6: 3, 5: 2},
+        {1: 1, 7: 2, 12: 3, 15: 2, 17: 2, 19: 3, 20: 2},
+    ), c.PLAYER_WHITE, 1, _DOUBLES),
+    # Одна фишка вне дома, точки 2-5 и 7 закрыты: часть кубиков не играется
+    ('forced_single_die', _position(
+        {8: 1, 6: 14},
+        {1: 2, 2: 2, 3: 2, 4: 2, 5: 2, 7: 2, 19: 3},
+    ), c.PLAYER_WHITE, 1, None),
+    # --- Выброс ---
+    ('bearoff_full_home', _position(
+        {1: 2, 2: 2, 3: 3, 4: 3, 5: 3, 6: 2},
+        {19: 3, 20: 3, 21: 3, 22: 2, 23: 2, 24: 2},
+    ), c.PLAYER_WHITE, 1, None),
+    # Кубик больше самой дальней фишки - выброс с самой дальней
+    ('bearoff_low_points', _position(
+        {1: 3, 2: 3, 3: 2},
+        {22: 4, 23: 4, 24: 4},
+    ), c.PLAYER_WHITE, 1, None),
+    # Пустые точки между фишками: пятеркой нельзя выбросить с 4
+    ('bearoff_gap', _position(
+        {6: 1, 4: 2, 1: 3},
+        {19: 5, 20: 5, 21: 5},
+    ), c.PLAYER_WHITE, 1, None),
+    # Одна фишка вне дома: сначала завести, потом выбрасывать
+    ('bearoff_one_outside', _position(
+        {7: 1, 1: 4, 2: 4, 3: 3},
+        {19: 5, 20: 5, 21: 5},
+    ), c.PLAYER_WHITE, 1, None),
+    # Выброс при контакте: блот черных в доме белых и фишка на баре
+    ('bearoff_contact', _position(
+        {1: 2, 2: 2, 3: 2, 4: 2, 6: 3},
+        {5: 1, 27: 1, 19: 5, 20: 4, 21: 4},
+    ), c.PLAYER_WHITE, 1, None),
+    ('bearoff_last_checker', _position(
+        {2: 1},
+        {23: 2, 24: 1},
+    ), c.PLAYER_WHITE, 1, None),
+    ('bearoff_black', _position(
+        {1: 4, 2: 4, 3: 4},
+        {19: 1, 20: 2, 22: 3, 24: 3},
+    ), c.PLAYER_BLACK, 1, None),
+]
+
+
+def perft(board, player_sign, depth, rolls=None):
+    """
+    Перебор на depth полуходов. Уровни обходятся по различным позициям
+    (одинаковые позиции раскрываются один раз, с учетом кратности),
+    поэтому глубина 2 остается быстрой даже из дебюта.
+    Возвращает словарь со счетчиками и временем генерации.
+    """
+    level = {(Board(board).key(), player_sign): (Board(board), 1)}
+    leaves = 0
+    calls = 0
+    gen_time = 0.0
+
+    for ply in range(depth):
+        next_level = {}
+        leaves = 0
+        for (_, sign), (node_board, multiplicity) in level.items():
+            for roll in (rolls if ply == 0 and rolls is not None else ALL_ROLLS):
+                started = time.perf_counter()
+                possible_turns = get_all_possible_turns(node_board, _roll_dice(roll), sign)
+                gen_time += time.perf_counter() - started
+                calls += 1
+
+                # Нет ходов - пропуск: позиция та же, ходит соперник
+                finals = {}
+                for sequence in (possible_turns or [[]]):
+                    result = node_board.copy()
+                    for move in sequence:
+                        make_move(result, move, sign)
+                    finals.setdefault((result.key(), -sign), result)
+
+                leaves += multiplicity * len(finals)
+                for key, result in finals.items():
+                    entry = next_level.get(key)
+                    next_level[key] = (result, multiplicity + (entry[1] if entry else 0))
+        level = next_level
+
+    digest = hashlib.sha1()
+    for key, sign in sorted(level):
+        digest.update(key)
+        digest.update(b'w' if sign == c.PLAYER_WHITE else b'b')
+
+    return {
+        'leaves': leaves,
+        'positions': len(level),
+        'digest': digest.hexdigest()[:16],
+        'calls': calls,
+        'gen_time': gen_time,
+    }
+
+
+def run_suite(names=None):
+    """Результаты для всех (или выбранных) позиций: имя -> счетчики по глубинам."""
+    results = {}
+    for name, board, sign, depth, rolls in POSITIONS:
+        if names and name not in names:
+            continue
+        results[name] = [perft(board, sign, d, rolls) for d in range(1, depth + 1)]
+    return results
+
+
+def _golden_view(results):
+    return {
+        name: [{key: stats[key] for key in ('leaves', 'positions', 'digest')} for stats in by_depth]
+        for name, by_depth in results.items()
+    }
+
+
+def load_golden(path=GOLDEN_FILE):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_golden(results, path=GOLDEN_FILE):
+    """Записывает эталон. Позиции, которых нет в results, остаются прежними."""
+    golden = load_golden(path) if os.path.exists(path) else {}
+    golden.update(_golden_view(results))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def compare_with_golden(results, golden):
+    """Список расхождений с эталоном (пустой - все совпало)."""
+    mismatches = []
+    for name, by_depth in _golden_view(results).items():
+        expected = golden.get(name)
+        if expected is None:
+            mismatches.append(f"{name}: нет в эталоне")
+            continue
+        for depth, (got, want) in enumerate(zip(by_depth, expected), 1):
+            if got != want:
+                mismatches.append(f"{name} d={depth}: получено {got}, эталон {want}")
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft генератора ходов")
+    parser.add_argument('--update', action='store_true', help="перезаписать эталонный файл")
+    parser.add_argument('--golden', default=GOLDEN_FILE, help="путь к эталонному файлу")
+    parser.add_argument('--cache', action='store_true',
+                        help="не отключать LRU-кэш ходов (по умолчанию меряется чистая генерация)")
+    parser.add_argument('positions', nargs='*', help="имена позиций (по умолчанию все)")
+    args = parser.parse_args(argv)
+
+    if not args.cache:
+        configure_turns_cache(0, 0)
+
+    started = time.perf_counter()
+    results = run_suite(args.positions)
+    total_time = time.perf_counter() - started
+
+    total_calls = 0
+    total_gen_time = 0.0
+    print(f"{'позиция':<22}{'d':>2}{'leaves':>11}{'positions':>11}{'поз/сек':>10}  digest")
+    for name, by_depth in results.items():
+        for depth, stats in enumerate(by_depth, 1):
+            rate = stats['calls'] / stats['gen_time'] if stats['gen_time'] else 0.0
+            print(f"{name:<22}{depth:>2}{stats['leaves']:>11}{stats['positions']:>11}{rate:>10.0f}  {stats['digest']}")
+            total_calls += stats['calls']
+            total_gen_time += stats['gen_time']
+
+    overall_rate = total_calls / total_gen_time if total_gen_time else 0.0
+    print(f"Генерация: {total_calls} позиций за {total_gen_time:.2f} с ({overall_rate:.0f} поз/сек), "
+          f"всего {total_time:.2f} с")
+
+    if args.update:
+        save_golden(results, args.golden)
+        print(f"Эталон записан: {args.golden}")
+        return 0
+
+    if not os.path.exists(args.golden):
+        print(f"Эталонный файл не найден: {args.golden} (запустите с --update)")
+        return 1
+
+    mismatches = compare_with_golden(results, load_golden(args.golden))
+    for line in mismatches:
+        print(f"РАСХОЖДЕНИЕ: {line}")
+    print("OK" if not mismatches else f"Расхождений: {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
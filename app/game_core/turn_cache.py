@@ -0,0 +1,86 @@
+# app/game_core/turn_cache.py
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Dict
+
+DEFAULT_MAX_SIZE = 50000
+DEFAULT_TTL = 3600.0 # сек.
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением по размеру и времени жизни записи.
+    Ведет счетчики попаданий/промахов для мониторинга.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: Optional[float] = DEFAULT_TTL):
+        self.max_size = max(0, int(max_size))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение или None (нет записи / запись устарела)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size == 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: Hashable):
+        """Удаляет запись, если она есть."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def configure(self, max_size: int, ttl: Optional[float]):
+        """Меняет лимиты (лишние записи вытесняются при следующем put)."""
+        with self._lock:
+            self.max_size = max(0, int(max_size))
+            self.ttl = ttl if ttl and ttl > 0 else None
+            if self.max_size == 0:
+                self._data.clear()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / total) if total else 0.0,
+            }
@@ -3,7 +3,7 @@ import threading
 import random
 import queue
 from typing import TYPE_CHECKING, Dict, Any, Callable
-from app.game_core import get_all_possible_turns, apply_move_to_board, roll_dice
+from app.game_core import get_all_possible_turns, get_move_tree, has_legal_move, turns_payload, apply_move_to_board, roll_dice
 from app.game_core import constants as c
 
 if TYPE_CHECKING:
@@ -60,13 +60,14 @@ class GameAIManager:
             
             elif player_roll > bot_roll:
                 game_state.turn = player_sign
-                game_state.dice = [player_roll, bot_roll]
+                dice = [player_roll, bot_roll]
                 print(f"[GameAIManager {self.game_id}] Первый бросок: Игрок ({player_roll}) > Бот ({bot_roll}). Игрок ходит первым.")
                 
-                possible_turns = get_all_possible_turns(game_state.board, game_state.dice, player_sign)
-                game_state.possible_turns = possible_turns
+                move_tree = get_move_tree(game_state.board, dice, player_sign)
+                possible_turns = move_tree.turns()
+                game_state.reset_turn(dice, possible_turns, move_tree)
 
-                dice_payload = {'dice': game_state.dice, 'possible_turns': possible_turns}
+                dice_payload = {'dice': game_state.dice, **turns_payload(possible_turns, move_tree)}
                 
                 notifications.append({
                     'event': 'dice_roll_result', 
@@ -76,11 +77,11 @@ class GameAIManager:
 
             else: # (player_roll < bot_roll)
                 game_state.turn = bot_sign
-                game_state.dice = [bot_roll, player_roll]
+                dice = [bot_roll, player_roll]
                 print(f"[GameAIManager {self.game_id}] Первый бросок: Бот ({bot_roll}) > Игрок ({player_roll}). Бот ходит первым.")
                 
-                possible_turns = get_all_possible_turns(game_state.board, game_state.dice, bot_sign)
-                game_state.possible_turns = possible_turns 
+                possible_turns = get_all_possible_turns(game_state.board, dice, bot_sign)
+                game_state.reset_turn(dice, possible_turns)
 
                 dice_payload = {'dice': game_state.dice, 'possible_turns': possible_turns}
                 
@@ -115,12 +116,12 @@ class GameAIManager:
             if modified_dice[0] == modified_dice[1]:
                 modified_dice.extend(modified_dice)
             
-            game_state.dice = modified_dice
-            game_state.history = []
+            game_state.reset_turn(modified_dice)
         
             current_dice = list(game_state.dice) 
-            current_board = list(game_state.board) 
+            current_board = game_state.board.copy()
             current_bot_sign = player_manager.bot_sign
+            current_bot_profile = player_manager.bot_profile
         
         if not self.game_session_callback:
              print(f"[GameAIManager {self.game_id}] CRITICAL ERROR: game_session_callback is None!")
@@ -130,7 +131,8 @@ class GameAIManager:
             current_board, 
             current_dice, 
             current_bot_sign, 
-            self 
+            self,
+            current_bot_profile
         )
                 
         print(f'[GameAIManager {self.game_id}] Запущен асинхронный расчет хода ИИ (Кости: {current_dice}).')
@@ -148,8 +150,10 @@ class GameAIManager:
             sid = player_manager.sid
                         
             # 1. Рассчитываем ВСЕ возможные ходы.
-            current_board_before_move = list(self.game_session_callback.state.board) 
-            all_possible_turns = get_all_possible_turns(current_board_before_move, dice, bot_sign)
+            current_board_before_move = self.game_session_callback.state.board.copy()
+            all_possible_turns = []
+            if has_legal_move(current_board_before_move, dice, bot_sign):
+                all_possible_turns = get_all_possible_turns(current_board_before_move, dice, bot_sign)
 
             # 2. Валидация: Убедимся, что ход, который выбрал ИИ, валиден.
             if bot_turn_dicts and bot_turn_dicts not in all_possible_turns:
@@ -179,7 +183,7 @@ class GameAIManager:
             
             if status == 'success':
                 # Используем эту копию, чтобы 'was_blot' корректно работал в цикле
-                current_board_for_blot_check = list(current_board_before_move)
+                current_board_for_blot_check = current_board_before_move.copy()
 
                 for move in bot_turn_dicts:
                     # 4.1. Рассчитываем, был ли это блот (ДО применения хода)
@@ -197,7 +201,7 @@ class GameAIManager:
                          game_state.borne_off_black += 1
                     
                     # Обновляем 'текущую' доску для следующей итерации (для 'was_blot')
-                    current_board_for_blot_check = list(game_state.board)
+                    current_board_for_blot_check = game_state.board.copy()
 
                     # 4.3. Проверяем победу ПОСЛЕ каждого шага
                     victory_notifications, game_ended = self.game_session_callback._check_and_handle_victory_internal(
@@ -211,7 +215,7 @@ class GameAIManager:
                         'borne_off_white': game_state.borne_off_white,
                         'borne_off_black': game_state.borne_off_black,
                         'was_blot': was_blot,
-                        'board_state': game_state.board[:28],
+                        'board_state': game_state.board.to_list(),
                         'is_bot_move': True
                     }
                     
@@ -228,15 +232,17 @@ class GameAIManager:
 
                 # 4.7. После цикла, если игра не закончилась, завершаем ход
                 if not game_ended:
-                    game_state.dice = []
+                    game_state.reset_turn()
                     game_state.turn = player_manager.player_sign 
                     notifications.append({'event': 'turn_finished', 'payload': {}, 'room': sid})
+                    self.ai_controller.prefetch_turns_async(game_state.board.copy(), player_manager.player_sign)
 
             else: # status == 'no_moves'
                 # Ходов нет, просто завершаем ход
-                game_state.dice = []
+                game_state.reset_turn()
                 game_state.turn = player_manager.player_sign 
                 notifications.append({'event': 'turn_finished', 'payload': {}, 'room': sid})
+                self.ai_controller.prefetch_turns_async(game_state.board.copy(), player_manager.player_sign)
                                 
             if self.notification_queue:
                 for msg in notifications:
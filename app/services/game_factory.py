@@ -4,7 +4,7 @@ import uuid
 import threading
 from flask import Flask
 from .game_session import GameSession
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional
 from .game_player_manager import GamePlayerManager
 from .game_turn_manager import GameTurnManager
 from .game_ai_manager import GameAIManager
@@ -87,7 +87,7 @@ class GameFactory:
         )
         return session
 
-    def create_pve_game(self, sid: str, bot_name: str, username: str) -> GameSession:
+    def create_pve_game(self, sid: str, bot_name: str, username: str, bot_profile: Optional[dict] = None) -> GameSession:
         """
         Создает и настраивает PVE игру.
         """
@@ -98,7 +98,7 @@ class GameFactory:
             game_mode='pve'
         )
         
-        new_game_session.setup_pve(sid, username, bot_name)
+        new_game_session.setup_pve(sid, username, bot_name, bot_profile)
         
         self.log_event("GAME_CREATED", f"PVE игра {game_id} создана для {username}", game_id=game_id, sid=sid)
         return new_game_session
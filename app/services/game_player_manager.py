@@ -6,7 +6,7 @@ import queue
 from typing import Optional, Dict, Any, TYPE_CHECKING, Callable
 
 from app.game_core.constants import STANDARD_WHITE_SETUP, STANDARD_BLACK_SETUP
-from app.game_core import get_all_possible_turns
+from app.game_core import get_move_tree, turns_payload
 from .game_state import STATE_PLAYING, STATE_FINISHED
 
 if TYPE_CHECKING:
@@ -60,6 +60,7 @@ class GamePlayerManager:
         self.sid: Optional[str] = None
         self.username: Optional[str] = None
         self.bot_name: Optional[str] = None
+        self.bot_profile: Optional[dict] = None # уровень и движок бота (VALID_BOTS)
         self.player_sign: int = 0 
         self.bot_sign: int = 0    
 
@@ -80,12 +81,13 @@ class GamePlayerManager:
 
     # --- Методы настройки ---
 
-    def setup_pve(self, sid: str, username: str, bot_name: str):
+    def setup_pve(self, sid: str, username: str, bot_name: str, bot_profile: Optional[dict] = None):
         """Настраивает PVE игру."""
         with self.lock:
             self.sid = sid
             self.username = username
             self.bot_name = bot_name
+            self.bot_profile = bot_profile
             self.log_event("SESSION_SETUP_PVE", f"Сессия {self.game_id} настроена для PVE.", game_id=self.game_id)
     
     def setup_pvp(self, sid_white: str, sid_black: str, username_white: str, username_black: str):
@@ -221,11 +223,11 @@ class GamePlayerManager:
             winner_sid = self.sid_white if winner_sign == 1 else self.sid_black
             loser_sid = self.sid_black if winner_sign == 1 else self.sid_white
 
-            game_state.history = []
-            possible_turns = get_all_possible_turns(game_state.board, game_state.dice, winner_sign)
-            game_state.possible_turns = possible_turns
+            move_tree = get_move_tree(game_state.board, game_state.dice, winner_sign)
+            possible_turns = move_tree.turns()
+            game_state.reset_turn(game_state.dice, possible_turns, move_tree)
 
-            payload = {'dice': game_state.dice, 'possible_turns': possible_turns}
+            payload = {'dice': game_state.dice, **turns_payload(possible_turns, move_tree)}
             
             if winner_sid:
                 notifications.append({'event': 'dice_roll_result', 'payload': payload, 'room': winner_sid})
@@ -91,10 +91,10 @@ class GameService:
 
     ### Создание игр ###
 
-    def create_new_game(self, sid: str, bot_name: str, username: str) -> Tuple[str, GameSession]:
-        """Создает новую PvE игру."""
+    def create_new_game(self, sid: str, bot_name: str, username: str, bot_profile: Optional[dict] = None) -> Tuple[str, GameSession]:
+        """Создает новую PvE игру (bot_profile - уровень и движок бота)."""
         
-        new_game_session = self.factory.create_pve_game(sid, bot_name, username)
+        new_game_session = self.factory.create_pve_game(sid, bot_name, username, bot_profile)
         self.registry.add_game(new_game_session)
         return new_game_session.id, new_game_session
 
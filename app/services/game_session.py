@@ -85,9 +85,9 @@ class GameSession:
     def get_temp_data(self, key):
         return self._temp_data.pop(key, None)
 
-    def setup_pve(self, sid: str, username: str, bot_name: str):
+    def setup_pve(self, sid: str, username: str, bot_name: str, bot_profile: Optional[dict] = None):
         with self.lock:
-            self.players.setup_pve(sid, username, bot_name)
+            self.players.setup_pve(sid, username, bot_name, bot_profile)
             self.state.session_state = STATE_AWAITING_READY
             self.log_event("STATE_CHANGE", f"State -> {STATE_AWAITING_READY} (PVE Setup)", game_id=self.id)
 
@@ -236,6 +236,20 @@ class GameSession:
 
             return notifications, False 
 
+    def submit_full_turn(self, sid: str, turn: list) -> tuple[list, bool]:
+        with self.lock:
+            notifications, bot_roll_needed, game_ended = self.turn_manager.submit_full_turn(
+                self.state, self.players, sid, turn
+            )
+
+            if game_ended:
+                return notifications, False
+
+            if bot_roll_needed:
+                self._trigger_full_bot_turn_internal(roll_notifications=[])
+
+            return notifications, False
+
     def player_give_up(self, sid: str) -> list:
         return self.turn_manager.player_give_up(self.state, self.players, sid)
         
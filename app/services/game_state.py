@@ -1,7 +1,7 @@
 # app/services/game_state.py
 
-from app.game_core import create_initial_board_state
-from typing import List, Dict, Any
+from app.game_core import create_initial_board_state, Board, MoveTree
+from typing import List, Dict, Any, Optional, Tuple
 
 STATE_CREATED = "CREATED"
 # PVE: Ожидание client_ready_for_roll. PVP: Ожидание player_ready от обоих.
@@ -18,11 +18,47 @@ class GameState:
     конкретной игры. Не содержит логики.
     """
     def __init__(self):
-        self.board: List[List[int]] = create_initial_board_state()
+        self.board: Board = create_initial_board_state()
         self.dice: List[int] = []
         self.history: List[Dict[str, Any]] = []
         self.turn: int = 0 # 0 = ничей (только в STARTING_ROLL при ничьей), 1 = белые, -1 = черные
         self.borne_off_white: int = 0
         self.borne_off_black: int = 0
         self.possible_turns: List[Dict[str, Any]] = []
-        self.session_state: str = STATE_CREATED
\ No newline at end of file
+        # Те же ходы в виде дерева: проверка шага и переход к следующему шагу без пересчета
+        self.move_tree: Optional[MoveTree] = None
+        # (possible_turns, move_tree) до каждого шага из history: отмена шага
+        # восстанавливает предыдущий набор ходов без пересчета
+        self.turns_stack: List[Tuple[list, Optional[MoveTree]]] = []
+        self.session_state: str = STATE_CREATED
+
+    def reset_turn(self, dice: Optional[List[int]] = None, possible_turns: Optional[list] = None,
+                   move_tree: Optional[MoveTree] = None):
+        """
+        Начало или конец хода. История шагов, стек отмены и ходы
+        меняются только вместе, чтобы стек не пережил свою историю.
+        """
+        self.dice = dice if dice is not None else []
+        self.possible_turns = possible_turns if possible_turns is not None else []
+        self.move_tree = move_tree
+        self.history = []
+        self.turns_stack = []
+
+    @property
+    def position_hash(self) -> int:
+        """
+        64-битный Zobrist-хэш текущей доски. Поддерживается самой доской
+        и обновляется за O(1) при каждом ходе и его отмене.
+        """
+        return self.board.zobrist
+
+    @property
+    def step_index(self) -> Dict[int, Tuple[int, bool]]:
+        """
+        Упакованный шаг (from * 32 + to, см. move_codec) -> (кубик, был ли блот)
+        для шагов, доступных прямо сейчас.
+        Индекс строится один раз для текущего дерева ходов.
+        """
+        if self.move_tree is None:
+            return {}
+        return self.move_tree.step_index()
\ No newline at end of file
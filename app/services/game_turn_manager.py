@@ -4,13 +4,16 @@ import threading
 from typing import TYPE_CHECKING, Dict, Any, Optional, Callable
 
 from app.game_core import (
-    get_all_possible_turns, 
+    get_move_tree,
+    has_legal_move,
+    turns_payload,
     apply_move_to_board, 
     roll_dice, 
     get_move_details,
     undo_move_on_board,
     get_winner,
     are_moves_available,
+    is_valid_step,
 )
 
 if TYPE_CHECKING:
@@ -19,6 +22,23 @@ if TYPE_CHECKING:
 
 from .game_state import STATE_PLAYING
 
+# Клетка доски -> расстояние до выброса (только клетки своей стороны)
+_WHITE_DISTANCE = {cell: cell for cell in range(0, 26)}
+_BLACK_DISTANCE = {**{point: 25 - point for point in range(1, 25)}, 26: 0, 27: 25}
+
+
+def _is_forward_step(fr: int, to: int, player_sign: int) -> bool:
+    """
+    Шаг идет по направлению игры и не длиннее кубика: сравниваются
+    расстояния до выброса (0 - выброшена, 25 - бар) в системе игрока.
+    """
+    distances = _WHITE_DISTANCE if player_sign == 1 else _BLACK_DISTANCE
+    fr_distance, to_distance = distances.get(fr), distances.get(to)
+    if fr_distance is None or to_distance is None:
+        return False
+    return 1 <= fr_distance - to_distance <= 6
+
+
 class GameTurnManager:
     """
     Управляет логикой одного хода: бросок, применение шага,
@@ -119,12 +139,17 @@ class GameTurnManager:
                 modified_dice.extend(modified_dice)
             
             possible_turns = []
+            move_tree = None
             moves_available = False
 
             try:
-                # Сначала вычисляем, только потом меняем состояние
-                possible_turns = get_all_possible_turns(game_state.board, modified_dice, player_sign)
-                moves_available = are_moves_available(possible_turns)
+                # Сначала вычисляем, только потом меняем состояние.
+                # Если ходить нечем (например, бар против закрытой доски),
+                # полный генератор не запускаем.
+                moves_available = has_legal_move(game_state.board, modified_dice, player_sign)
+                if moves_available:
+                    move_tree = get_move_tree(game_state.board, modified_dice, player_sign)
+                    possible_turns = move_tree.turns()
             
             except Exception as e:
                 # Ловим любое неожиданное исключение во время расчета ходов
@@ -142,13 +167,11 @@ class GameTurnManager:
             # --- 3. Обновление состояния игры (Commit) ---
             # Расчеты прошли успешно, теперь можно безопасно изменить game_state
 
-            game_state.dice = modified_dice
-            game_state.history = [] # Очищаем историю предыдущего хода
-            game_state.possible_turns = possible_turns
+            game_state.reset_turn(modified_dice, possible_turns, move_tree) # Очищаем историю предыдущего хода
 
             # --- 4. Отправка уведомлений ---
             
-            payload = {'dice': modified_dice, 'possible_turns': possible_turns}
+            payload = {'dice': modified_dice, **turns_payload(possible_turns, move_tree)}
             
             if self.game_mode == 'pve':
                 notifications.append({'event': 'dice_roll_result', 'payload': payload, 'room': sid})
@@ -168,7 +191,7 @@ class GameTurnManager:
                 )
                 
                 # Очищаем состояние и передаем ход
-                game_state.dice, game_state.possible_turns, game_state.history = [], [], []
+                game_state.reset_turn()
                 game_state.turn = -player_sign
                 
                 if self.game_mode == 'pve':
@@ -208,10 +231,16 @@ class GameTurnManager:
                 notifications.append({'event': 'move_rejection', 'payload': {'message': 'Сейчас не ваш ход.'}, 'room': sid})
                 return notifications
 
+            # Шаги сравниваются упакованными: from/to вне доски дали бы чужой шаг
+            if not is_valid_step(step):
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Недопустимый ход.'}, 'room': sid})
+                return notifications
+
             # --- 2. Фаза "Calculate" (Расчет в try-блоке) ---
             try:
                 is_valid, die_used, was_blot = get_move_details(
-                    game_state.board, game_state.dice, player_sign, step, game_state.possible_turns
+                    game_state.board, game_state.dice, player_sign, step,
+                    game_state.possible_turns, game_state.move_tree
                 )
                 
                 if not is_valid or die_used is None:
@@ -233,8 +262,14 @@ class GameTurnManager:
                 temp_dice.remove(die_used)
                 
                 new_possible_turns = []
+                new_move_tree = None
                 if temp_dice:
-                     new_possible_turns = get_all_possible_turns(new_board, temp_dice, player_sign)
+                    # Оставшиеся ходы - поддерево сыгранного шага, без новой генерации
+                    if game_state.move_tree is not None:
+                        new_move_tree = game_state.move_tree.descend(step)
+                    else:
+                        new_move_tree = get_move_tree(new_board, temp_dice, player_sign)
+                    new_possible_turns = new_move_tree.turns()
 
             except Exception as e:
                 self.log_event(
@@ -254,7 +289,9 @@ class GameTurnManager:
             game_state.borne_off_black = new_borne_off_black
             game_state.dice = temp_dice
             game_state.history.append({'step': step, 'die_used': die_used, 'was_blot': was_blot})
+            game_state.turns_stack.append((game_state.possible_turns, game_state.move_tree))
             game_state.possible_turns = new_possible_turns
+            game_state.move_tree = new_move_tree
             
             # --- 4. Немедленная проверка победы ---
             
@@ -272,18 +309,18 @@ class GameTurnManager:
             payload_player = {
                 'applied_move': step, 
                 'remaining_dice': temp_dice,
-                'possible_turns': new_possible_turns, 
+                **turns_payload(new_possible_turns, new_move_tree),
                 'can_undo': can_undo,
                 'borne_off_white': game_state.borne_off_white, 
                 'borne_off_black': game_state.borne_off_black,
-                'board_state': game_state.board[:28]
+                'board_state': game_state.board.to_list()
             }
             payload_opponent = {
                 'applied_move': step,
                 'borne_off_white': game_state.borne_off_white, 
                 'borne_off_black': game_state.borne_off_black,
                 'was_blot': was_blot,
-                'board_state': game_state.board[:28]
+                'board_state': game_state.board.to_list()
             }
                 
             notifications.append({'event': 'step_accepted', 'payload': payload_player, 'room': sid})
@@ -327,21 +364,28 @@ class GameTurnManager:
 
             game_state.dice.append(die_used)
             game_state.dice.sort(reverse=True)
-            new_possible_turns = get_all_possible_turns(game_state.board, game_state.dice, player_sign)
+            # Стек и история меняются вместе (apply_player_step / GameState.reset_turn)
+            if len(game_state.turns_stack) == len(game_state.history) + 1:
+                new_possible_turns, new_move_tree = game_state.turns_stack.pop()
+            else:
+                game_state.turns_stack = []
+                new_move_tree = get_move_tree(game_state.board, game_state.dice, player_sign)
+                new_possible_turns = new_move_tree.turns()
             game_state.possible_turns = new_possible_turns
+            game_state.move_tree = new_move_tree
             can_undo = len(game_state.history) > 0
 
             payload_player = {
                 'reverted_move': last_move_data, 'remaining_dice': game_state.dice,
-                'possible_turns': new_possible_turns, 'can_undo': can_undo,
+                **turns_payload(new_possible_turns, new_move_tree), 'can_undo': can_undo,
                 'borne_off_white': new_borne_white, 'borne_off_black': new_borne_black,
                 'suppress_automove': True,
-                'board_state': new_board[:28]
+                'board_state': new_board.to_list()
             }
             payload_opponent = {
                 'reverted_move': last_move_data,
                 'borne_off_white': new_borne_white, 'borne_off_black': new_borne_black,
-                'board_state': new_board[:28]
+                'board_state': new_board.to_list()
             }
 
             notifications.append({'event': 'undo_accepted', 'payload': payload_player, 'room': sid})
@@ -381,7 +425,7 @@ class GameTurnManager:
             if game_ended:
                 return notifications, bot_roll_needed, game_ended
 
-            game_state.dice, game_state.possible_turns, game_state.history = [], [], []
+            game_state.reset_turn()
             game_state.turn = -player_sign
             
             if self.game_mode == 'pve':
@@ -393,6 +437,143 @@ class GameTurnManager:
 
             return notifications, bot_roll_needed, game_ended
             
+    def submit_full_turn(self, game_state: 'GameState', player_manager: 'GamePlayerManager', sid: str, turn: list) -> tuple[list, bool, bool]:
+        """
+        Принимает весь ход одним сообщением (вместо send_player_step на каждый шаг
+        и send_turn_finished). Итоговая позиция ищется в индексе итоговых позиций
+        дерева ходов, построенного при броске, - без новой генерации. Ход
+        применяется целиком и завершается одним событием full_turn_accepted.
+        """
+        with self.lock:
+            notifications = []
+            bot_roll_needed = False
+            game_ended = False
+
+            # --- 1. Проверки-предохранители (Guard Clauses) ---
+
+            if game_state.session_state != STATE_PLAYING:
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Ход невозможен, игра не активна.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            player_context = player_manager.get_player_context(sid)
+            if player_context is None:
+                self.log_event("AUTH_ERROR", f"Player not found for sid {sid} during submit_full_turn", sid=sid, game_id=self.game_id)
+                return notifications, bot_roll_needed, game_ended
+
+            player_sign, opponent_sid = player_context
+
+            if game_state.turn != player_sign:
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Сейчас не ваш ход.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            if not game_state.dice:
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Сначала бросьте кубики.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            if game_state.history:
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Ход уже начат по шагам, завершите его.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            # Шагов не больше, чем кубиков: иначе один запрос занял бы хаб надолго
+            if not isinstance(turn, list) or not turn or len(turn) > len(game_state.dice):
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Недопустимый ход.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            # --- 2. Фаза "Calculate" ---
+            try:
+                steps = []
+                final_board = game_state.board
+                board_size = len(final_board)
+                for step in turn:
+                    fr, to = step['from'], step['to']
+                    if not (isinstance(fr, int) and isinstance(to, int) and 0 <= fr < board_size and 0 <= to < board_size):
+                        raise ValueError(f"step out of range: {step}")
+                    if not _is_forward_step(fr, to, player_sign):
+                        raise ValueError(f"step against direction of play: {step}")
+                    if final_board[fr] * player_sign <= 0:
+                        raise ValueError(f"no checker at {fr}")
+                    steps.append({'from': fr, 'to': to})
+                    final_board = apply_move_to_board(final_board, steps[-1], player_sign)
+            except (KeyError, TypeError, ValueError):
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Недопустимый ход.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            try:
+                move_tree = game_state.move_tree
+                if move_tree is None:
+                    move_tree = get_move_tree(game_state.board, game_state.dice, player_sign)
+
+                # Один поиск: есть ли легальный полный ход с такой итоговой позицией
+                legal_turn = move_tree.match_final(final_board)
+                edges = None
+                if legal_turn is not None:
+                    # Дерево содержит все порядки шагов легальных ходов, поэтому
+                    # присланная последовательность обязана быть путем по нему.
+                    # Иначе итоговая позиция легальна, но шаги выдуманы (например,
+                    # фишка перепрыгнула закрытый пункт) - такой ход отклоняется.
+                    edges = move_tree.full_turn_edges(steps)
+                    if edges is None:
+                        self.log_event(
+                            "INVALID_TURN",
+                            f"Steps {steps} reach a legal position but are not a legal path (e.g. {legal_turn})",
+                            sid=sid,
+                            game_id=self.game_id
+                        )
+                        legal_turn = None
+
+            except Exception as e:
+                self.log_event(
+                    "CRITICAL_ERROR",
+                    f"Failed during 'submit_full_turn' validation. Error: {e}",
+                    sid=sid,
+                    game_id=self.game_id,
+                    exc_info=True
+                )
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Ошибка сервера при обработке хода.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            if legal_turn is None:
+                notifications.append({'event': 'move_rejection', 'payload': {'message': 'Недопустимый ход.'}, 'room': sid})
+                return notifications, bot_roll_needed, game_ended
+
+            # --- 3. Фаза "Commit" (весь ход сразу) ---
+
+            for step in steps:
+                if player_sign == 1 and step['to'] == 0:
+                    game_state.borne_off_white += 1
+                elif player_sign == -1 and step['to'] == 26:
+                    game_state.borne_off_black += 1
+            game_state.board = final_board
+            game_state.reset_turn()
+
+            # --- 4. Одно итоговое событие (ход принят и завершен) ---
+
+            payload = {
+                'applied_turn': steps,
+                'was_blot': [was_blot for _, was_blot in edges],
+                'borne_off_white': game_state.borne_off_white,
+                'borne_off_black': game_state.borne_off_black,
+                'board_state': final_board.to_list()
+            }
+            notifications.append({'event': 'full_turn_accepted', 'payload': payload, 'room': sid})
+            if opponent_sid:
+                notifications.append({'event': 'opponent_full_turn_executed', 'payload': payload, 'room': opponent_sid})
+
+            # --- 5. Проверка победы ---
+
+            victory_notifications, game_ended = self._check_and_handle_victory(
+                game_state, player_manager, final_bot_turn=None
+            )
+            notifications.extend(victory_notifications)
+            if game_ended:
+                return notifications, bot_roll_needed, game_ended
+
+            game_state.turn = -player_sign
+            if self.game_mode == 'pve':
+                bot_roll_needed = True
+
+            return notifications, bot_roll_needed, game_ended
+
     def player_give_up(self, game_state: 'GameState', player_manager: 'GamePlayerManager', sid: str) -> list:
         with self.lock:
             notifications = []
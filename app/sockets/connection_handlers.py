@@ -7,7 +7,7 @@ from jwt.exceptions import ExpiredSignatureError, DecodeError
 from ..extensions import socketio 
 from ..globals import sid_to_user, sid_to_user_lock, log_event
 from app.services.user_service import get_player_data_by_username
-from app.game_core import get_all_possible_turns
+from app.game_core import get_move_tree, turns_payload
 from app.game_core.constants import STANDARD_WHITE_SETUP, STANDARD_BLACK_SETUP
 from app.services.game_state import STATE_PLAYING, STATE_AWAITING_READY, STATE_STARTING_ROLL
 
@@ -148,13 +148,15 @@ def handle_client_ready_for_sync():
                         print(f"[ERROR] Не удалось отправить opponent_data при реконнекте: {e}")
 
                 possible_turns = []
+                move_tree = None
                 if current_session_state == STATE_PLAYING:
-                    possible_turns = get_all_possible_turns(board_state, dice, current_turn_sign)
+                    move_tree = get_move_tree(board_state, dice, current_turn_sign)
+                    possible_turns = move_tree.turns()
 
                 emit('full_game_sync', {
-                    'board_state': board_state[:28],
+                    'board_state': board_state.to_list(),
                     'dice': dice,
-                    'possible_turns': possible_turns,
+                    **turns_payload(possible_turns, move_tree),
                     'turn': current_turn_sign,
                     'borne_off_white': game_session.state.borne_off_white,
                     'borne_off_black': game_session.state.borne_off_black,
@@ -6,11 +6,15 @@ from ..extensions import socketio
 from ..globals import sid_to_user, sid_to_user_lock, log_event
 from app.services.user_service import get_player_data_by_username
 from app.game_core.constants import STANDARD_WHITE_SETUP, STANDARD_BLACK_SETUP 
+from app.game_core.evaluator import ENGINE_GNUBG, ENGINE_LINEAR
 
+# Уровень бота -> имя бота и движок:
+# 'linear' - встроенный линейный оценщик (noise - шум оценки, слабее бот),
+# 'gnubg' - внешний gnubg.
 VALID_BOTS = {
-    'easy': 'Bot_Easy',
-    # 'medium': 'Bot_Medium', # Если появится в будущем
-    # 'hard': 'Bot_Hard',     #
+    'easy': {'name': 'Bot_Easy', 'engine': ENGINE_LINEAR, 'noise': 1.5},
+    'medium': {'name': 'Bot_Medium', 'engine': ENGINE_LINEAR},
+    'hard': {'name': 'Bot_Hard', 'engine': ENGINE_GNUBG},
 }
 
 
@@ -51,15 +55,18 @@ def handle_start_pve(data):
 
     # --- 1. Валидация и создание игры ---
     bot_level = data.get('bot_level')
-    bot_name = VALID_BOTS.get(bot_level)
+    bot = VALID_BOTS.get(bot_level)
     
-    if not bot_name:
+    if not bot:
         emit('move_rejection', {'message': 'Invalid bot level requested.'})
         return
 
+    bot_name = bot['name']
+    bot_profile = {'level': bot_level, 'engine': bot['engine'], 'noise': bot.get('noise', 0.0)}
+
     print(f"[GameService] {sid} ({username}) запросил PVE игру против {bot_name}.")
     
-    game_id, new_game_session = game_service.create_new_game(sid, bot_name, username)
+    game_id, new_game_session = game_service.create_new_game(sid, bot_name, username, bot_profile)
     
     log_event("GAME_CREATE_PVE", f"User started new PVE game against {bot_name}.", sid=sid, game_id=game_id)
     
@@ -259,6 +266,32 @@ def handle_player_step(data):
     for msg in notifications:
         emit(msg['event'], msg['payload'], room=msg['room'])
 
+@socketio.on('submit_full_turn')
+def handle_submit_full_turn(data):
+    """
+    Весь ход одним сообщением: {'turn': [{'from': .., 'to': ..}, ...]}.
+    Заменяет серию send_player_step + send_turn_finished, ответ - одно
+    событие full_turn_accepted (или move_rejection).
+    """
+    game_service = current_app.game_service
+    
+    sid = request.sid
+    game_session = game_service.get_game_by_sid(sid)
+    if not game_session: 
+        print(f"[SocketHandler] {sid} отправил 'submit_full_turn', но игра не найдена.")
+        return
+    
+    turn_data = data.get('turn') if data else None
+    if not isinstance(turn_data, list):
+        print(f"[SocketHandler] {sid} отправил 'submit_full_turn' без 'turn'.")
+        emit('move_rejection', {'message': 'Недопустимый ход.'})
+        return
+    
+    notifications, _ = game_session.submit_full_turn(sid, turn_data)
+    
+    for msg in notifications:
+        emit(msg['event'], msg['payload'], room=msg['room'])
+
 @socketio.on('find_pvp_match')
 def handle_find_pvp_match():
     """
@@ -0,0 +1,143 @@
+# tests/test_batch_moves.py
+"""
+Дифференциальные тесты batch_moves: пакетный генератор должен давать
+то же множество пар "первый шаг + итоговая позиция", что и
+get_all_possible_turns, на каждой доске.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.game_core import constants as c
+from app.game_core.batch_moves import batch_possible_turns
+from app.game_core.board_state import apply_move_to_board, create_initial_board_state
+from app.game_core.move_generator import get_all_possible_turns
+
+ALL_DICE = [[d1, d2] for d1 in range(1, 7) for d2 in range(1, 7)]
+
+
+def _outcomes(board, turns, player_sign) -> set:
+    outcomes = set()
+    for sequence in turns:
+        final = list(board)
+        for move in sequence:
+            final = apply_move_to_board(final, move, player_sign)
+        outcomes.add((sequence[0]['from'], sequence[0]['to'], tuple(final)))
+    return outcomes
+
+
+def _expand(dice):
+    return dice * 2 if len(dice) == 2 and dice[0] == dice[1] else list(dice)
+
+
+def _random_board(rng, bar_chance=0.25, home_only_chance=0.3):
+    """Случайная легальная расстановка: выброшенные фишки, бар, только дом."""
+    board = [0] * 28
+    for sign, home, bar, home_points in (
+        (c.PLAYER_WHITE, c.HOME_WHITE, c.BAR_WHITE, c.HOME_BOARD_WHITE),
+        (c.PLAYER_BLACK, c.HOME_BLACK, c.BAR_BLACK, c.HOME_BOARD_BLACK),
+    ):
+        remaining = 15
+        borne_off = rng.choice([0, 0, 0, rng.randint(0, 14)])
+        board[home] = sign * borne_off
+        remaining -= borne_off
+
+        home_only = rng.random() < home_only_chance
+        if not home_only and rng.random() < bar_chance:
+            on_bar = min(rng.randint(1, 3), remaining)
+            board[bar] = sign * on_bar
+            remaining -= on_bar
+
+        points = list(home_points) if home_only else list(range(c.POINT_1, c.POINT_24 + 1))
+        points = [p for p in points if board[p] * sign >= 0]
+        while remaining:
+            point = rng.choice(points)
+            if board[point] * sign < 0:
+                points.remove(point)
+                continue
+            board[point] += sign
+            remaining -= 1
+    return board
+
+
+def _random_boards(seed, count, **kwargs):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        try:
+            boards.append(_random_board(rng, **kwargs))
+        except IndexError:
+            # Все пункты заняты соперником - пробуем другую расстановку
+            continue
+    return boards
+
+
+def _assert_matches(boards, dice, player_sign):
+    batch = batch_possible_turns(np.array(boards, dtype=np.int8), dice, player_sign)
+    assert len(batch) == len(boards)
+    for board, batch_turns in zip(boards, batch):
+        reference = get_all_possible_turns(list(board), list(dice), player_sign)
+        assert _outcomes(board, batch_turns, player_sign) == _outcomes(board, reference, player_sign), \
+            f"board={board} dice={dice} sign={player_sign}"
+
+
+@pytest.mark.parametrize('player_sign', [c.PLAYER_WHITE, c.PLAYER_BLACK])
+@pytest.mark.parametrize('dice', ALL_DICE)
+def test_random_boards(dice, player_sign):
+    boards = _random_boards(seed=hash((tuple(dice), player_sign)) & 0xFFFF, count=40)
+    _assert_matches(boards, _expand(dice), player_sign)
+
+
+@pytest.mark.parametrize('player_sign', [c.PLAYER_WHITE, c.PLAYER_BLACK])
+@pytest.mark.parametrize('die', range(1, 7))
+def test_doubles_with_checkers_on_bar(die, player_sign):
+    boards = _random_boards(seed=100 + die, count=40, bar_chance=1.0, home_only_chance=0.0)
+    _assert_matches(boards, [die] * 4, player_sign)
+
+
+@pytest.mark.parametrize('player_sign', [c.PLAYER_WHITE, c.PLAYER_BLACK])
+@pytest.mark.parametrize('dice', ALL_DICE)
+def test_bear_off(dice, player_sign):
+    boards = _random_boards(seed=200 + 6 * dice[0] + dice[1], count=30, bar_chance=0.0, home_only_chance=1.0)
+    _assert_matches(boards, _expand(dice), player_sign)
+
+
+@pytest.mark.parametrize('player_sign', [c.PLAYER_WHITE, c.PLAYER_BLACK])
+@pytest.mark.parametrize('dice', [[1], [4], [6], [3, 3], [5, 5, 5], [2, 2, 2]])
+def test_partial_dice(dice, player_sign):
+    """Остаток кубиков посреди хода: один кубик или неполный дубль."""
+    boards = _random_boards(seed=300 + sum(dice), count=40)
+    _assert_matches(boards, dice, player_sign)
+
+
+def test_initial_position():
+    board = create_initial_board_state()
+    for dice in ALL_DICE:
+        for player_sign in (c.PLAYER_WHITE, c.PLAYER_BLACK):
+            _assert_matches([board], _expand(dice), player_sign)
+
+
+def test_only_one_die_playable():
+    """Сыграть можно только один кубик: остальные шаги заблокированы."""
+    board = [0] * 28
+    board[c.POINT_24] = 1
+    board[c.HOME_WHITE] = 14
+    for point in (18, 17, 16, 15, 14, 13):
+        board[point] = -2
+    board[c.HOME_BLACK] = -3
+    for dice in ([6, 5], [5, 6], [6, 1], [2, 2, 2, 2], [6, 6, 6, 6]):
+        _assert_matches([board], dice, c.PLAYER_WHITE)
+
+
+def test_no_legal_moves():
+    board = [0] * 28
+    board[c.BAR_WHITE] = 2
+    board[c.HOME_WHITE] = 13
+    for point in range(19, 25):
+        board[point] = -2
+    board[c.HOME_BLACK] = -3
+    batch = batch_possible_turns(np.array([board], dtype=np.int8), [3, 5], c.PLAYER_WHITE)
+    assert batch == [[]]
+    assert get_all_possible_turns(board, [3, 5], c.PLAYER_WHITE) == []
@@ -0,0 +1,42 @@
+# tests/test_eval_cache.py
+"""Кэш решений gnubg: запись в SQLite и поведение при занятой базе."""
+
+import sqlite3
+import time
+
+from app.game_core import eval_cache
+from app.game_core.eval_cache import GnuBGEvalCache
+
+
+def test_roundtrip_through_database(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    GnuBGEvalCache(path, memory_size=10).put('pid', 'mid', 'hard', (425, 291))
+
+    fresh = GnuBGEvalCache(path, memory_size=10)
+    assert fresh.get('pid', 'mid', 'hard') == (425, 291)
+    assert fresh.stats()['db_hits'] == 1
+    assert fresh.size_on_disk() == 1
+
+
+def test_locked_database_is_a_quick_miss(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = GnuBGEvalCache(path, memory_size=10)
+
+    # Другой процесс держит блокировку записи
+    holder = sqlite3.connect(path)
+    holder.execute('BEGIN EXCLUSIVE')
+    try:
+        started = time.monotonic()
+        assert cache.get('pid', 'mid', 'hard') is None
+        cache.put('pid', 'mid', 'hard', (425,))
+        elapsed = time.monotonic() - started
+    finally:
+        holder.rollback()
+        holder.close()
+
+    # Две операции по DB_TIMEOUT, а не по несколько секунд
+    assert elapsed < 10 * eval_cache.DB_TIMEOUT
+    # Чтение в режиме WAL не ждет писателя, запись - ошибка и пропуск
+    assert cache.stats()['db_errors'] == 1
+    # Ход остался в памяти процесса
+    assert cache.get('pid', 'mid', 'hard') == (425,)
@@ -0,0 +1,133 @@
+# tests/test_gnubg_pool.py
+"""
+Пул процессов gnubg против поддельного gnubg (скрипт на Python).
+
+Поддельный процесс, как и настоящий под каналом: stdout буферизуется
+и сбрасывается с задержкой, а "Unknown command" для маркера идет в stderr
+сразу - то есть ответ на маркер обгоняет вывод hint.
+"""
+
+import sys
+import textwrap
+
+import pytest
+
+from app.game_core import gnubg_interface
+from app.game_core.gnubg_service import HINT_LINE, _hint_commands
+
+FAKE_GNUBG = textwrap.dedent('''
+    import os, sys, time, threading
+
+    lock = threading.Lock()
+    hints = 0
+    swapped = False
+
+    def out(text, delay=0.0):
+        def flush():
+            with lock:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+        if delay:
+            threading.Timer(delay, flush).start()
+        else:
+            flush()
+
+    for line in sys.stdin:
+        command = line.strip()
+        if command == 'hint 1':
+            hints += 1
+            out(f"    1. Cubeful 0-ply    13/9 13/11    Eq.: +0.{hints:03d} swapped={int(swapped)}\\n"
+                "       0.500 0.100 0.000 - 0.500 0.100 0.000\\n", delay=0.2)
+        elif command == 'swap players':
+            swapped = not swapped
+        elif command.startswith('sleep '):
+            time.sleep(float(command.split()[1]))
+        elif command == 'crash':
+            os._exit(1)
+        elif command.startswith('set '):
+            pass
+        else:
+            sys.stderr.write(f"Unknown command `{command}'.\\n")
+            sys.stderr.flush()
+''')
+
+
+@pytest.fixture
+def fake_gnubg(tmp_path, monkeypatch):
+    script = tmp_path / 'fake_gnubg.py'
+    script.write_text(FAKE_GNUBG)
+    monkeypatch.setattr(gnubg_interface, 'GNUBG_COMMAND', [sys.executable, str(script)])
+    monkeypatch.setattr(gnubg_interface, 'GNUBG_CWD', str(tmp_path))
+    pools = []
+
+    def make_pool(**kwargs):
+        kwargs.setdefault('size', 1)
+        kwargs.setdefault('request_timeout', 3.0)
+        kwargs.setdefault('healthcheck_interval', 60.0)
+        pool = gnubg_interface.GnuBGProcessPool(**kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make_pool
+    for pool in pools:
+        pool.shutdown()
+
+
+def _hint(output):
+    lines = [line for line in output.splitlines() if HINT_LINE in line]
+    assert len(lines) == 1, output
+    return lines[0]
+
+
+def test_hint_waits_past_marker_and_back_to_back(fake_gnubg):
+    pool = fake_gnubg()
+    for number in range(1, 6):
+        output = pool.run(_hint_commands('4HPwATDgc/ABMA', 'cAkAAAAAAAAA', 1), until=HINT_LINE)
+        hint = _hint(output)
+        # Каждый ответ - свой hint, без хвоста предыдущего запроса
+        assert f"Eq.: +0.{number:03d}" in hint
+        # 'swap players' отменяется в конце пакета: состояние не копится
+        assert hint.endswith("swapped=1")
+
+
+def test_plain_batch_returns_on_marker(fake_gnubg):
+    pool = fake_gnubg()
+    assert pool.run("set confirm new off\n") == ""
+
+
+def test_timeout_restarts_worker(fake_gnubg):
+    pool = fake_gnubg(request_timeout=0.5)
+    worker = pool._workers[0]
+    pid_before = worker.process.pid
+
+    assert pool.run("sleep 5\n") == ""
+    assert worker.process.pid != pid_before
+    assert "Eq.: +0.001" in _hint(pool.run("hint 1\n", until=HINT_LINE))
+
+
+def test_crash_restarts_worker(fake_gnubg):
+    pool = fake_gnubg()
+    worker = pool._workers[0]
+    pid_before = worker.process.pid
+
+    assert pool.run("crash\n") == ""
+    assert worker.is_alive() and worker.process.pid != pid_before
+    assert "Eq.: +0.001" in _hint(pool.run("hint 1\n", until=HINT_LINE))
+
+
+def test_dead_worker_restarted_before_request(fake_gnubg):
+    pool = fake_gnubg()
+    worker = pool._workers[0]
+    worker.process.kill()
+    worker.process.wait()
+
+    assert "Eq.: +0.001" in _hint(pool.run("hint 1\n", until=HINT_LINE))
+
+
+def test_missing_expected_line_restarts_worker(fake_gnubg):
+    pool = fake_gnubg()
+    worker = pool._workers[0]
+    pid_before = worker.process.pid
+
+    assert pool.run("set board x\n", until=HINT_LINE) == ""
+    assert worker.process.pid != pid_before
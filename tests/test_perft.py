@@ -0,0 +1,32 @@
+# tests/test_perft.py
+"""
+Perft глубины 1 против эталона data/perft_golden.json: изменение множества
+ходов генератора ломает pytest, а не только ручной запуск app.game_core.perft.
+Глубина 2 (дебют, блиц) остается за CLI - она заметно дольше.
+"""
+
+import pytest
+
+from app.game_core.perft import POSITIONS, compare_with_golden, load_golden, perft
+
+
+@pytest.fixture(scope='module')
+def golden():
+    return load_golden()
+
+
+def test_every_position_has_golden(golden):
+    assert [name for name, *_ in POSITIONS if name not in golden] == []
+
+
+@pytest.mark.parametrize('name, board, sign, depth, rolls', POSITIONS, ids=[p[0] for p in POSITIONS])
+def test_depth_one_matches_golden(golden, name, board, sign, depth, rolls):
+    results = {name: [perft(board, sign, 1, rolls)]}
+    assert compare_with_golden(results, golden) == []
+
+
+def test_mismatch_is_reported(golden):
+    name, board, sign, _, rolls = POSITIONS[0]
+    stats = perft(board, sign, 1, rolls)
+    stats['leaves'] += 1
+    assert len(compare_with_golden({name: [stats]}, golden)) == 1
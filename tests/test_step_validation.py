@@ -0,0 +1,88 @@
+# tests/test_step_validation.py
+"""
+Регрессия: шаги от клиента упаковываются как from * 32 + to, поэтому
+шаг с from/to вне доски не должен совпасть с легальным шагом.
+"""
+
+import pytest
+
+from app.game_core import constants as c
+from app.game_core import create_initial_board_state, get_move_details, get_move_tree
+from app.game_core.move_codec import dict_to_move, is_valid_step, pack_move
+from app.services.game_state import GameState, STATE_PLAYING
+from app.services.game_turn_manager import GameTurnManager
+
+CONFIG = {'ELO_REWARD_WIN': 1, 'MONEY_REWARD_WIN': 10, 'ELO_PENALTY_LOSS': -1}
+
+# {'from': 12, 'to': 41} упаковывается в то же число, что и легальный 13/9
+ALIASED_STEP = {'from': 12, 'to': 41}
+INVALID_STEPS = [
+    ALIASED_STEP,
+    {'from': 13, 'to': 28},
+    {'from': -1, 'to': 9},
+    {'from': 13.0, 'to': 9},
+    {'from': '13', 'to': 9},
+    {'from': True, 'to': 0},
+    {'from': 13},
+    [13, 9],
+]
+
+
+class _Players:
+    """Минимальный GamePlayerManager: один игрок за белых."""
+
+    def get_player_context(self, sid):
+        return (c.PLAYER_WHITE, None) if sid == 'W' else None
+
+
+def _playing_state(dice):
+    state = GameState()
+    state.session_state = STATE_PLAYING
+    state.turn = c.PLAYER_WHITE
+    state.dice = list(dice)
+    state.move_tree = get_move_tree(state.board, state.dice, c.PLAYER_WHITE)
+    state.possible_turns = state.move_tree.turns()
+    return state
+
+
+def test_aliased_step_packs_like_legal_step():
+    assert (12 << 5) | 41 == pack_move(13, 9)
+    assert not is_valid_step(ALIASED_STEP)
+    with pytest.raises(ValueError):
+        dict_to_move(ALIASED_STEP)
+
+
+@pytest.mark.parametrize('step', INVALID_STEPS)
+def test_move_tree_rejects_invalid_steps(step):
+    board = create_initial_board_state()
+    tree = get_move_tree(board, [4, 2], c.PLAYER_WHITE)
+    assert tree.lookup(step) is None
+    assert tree.descend(step) is None
+    assert tree.full_turn_edges([step]) is None
+    assert get_move_details(board, [4, 2], c.PLAYER_WHITE, step, tree.turns(), tree) == (False, None, False)
+
+
+@pytest.mark.parametrize('step', INVALID_STEPS)
+def test_apply_player_step_rejects_invalid_steps(step):
+    manager = GameTurnManager('g', 'pvp', CONFIG, lambda *a, **k: None, None, None, None)
+    state = _playing_state([4, 2])
+    board_before = state.board.to_list()
+
+    notifications = manager.apply_player_step(state, _Players(), 'W', step)
+
+    assert [n['event'] for n in notifications] == ['move_rejection']
+    assert state.board.to_list() == board_before
+    assert state.dice == [4, 2]
+    assert not state.history
+
+
+def test_apply_player_step_accepts_legal_step():
+    manager = GameTurnManager('g', 'pvp', CONFIG, lambda *a, **k: None, None, None, None)
+    state = _playing_state([4, 2])
+
+    notifications = manager.apply_player_step(state, _Players(), 'W', {'from': 13, 'to': 9})
+
+    assert notifications[0]['event'] == 'step_accepted'
+    assert state.dice == [2]
+    assert state.board[13] == 4 and state.board[9] == 1
+    assert sum(v for v in state.board.to_list() if v < 0) == -15
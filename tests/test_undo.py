@@ -0,0 +1,58 @@
+# tests/test_undo.py
+"""Отмена шага: стек ходов живет в GameState рядом с history и move_tree."""
+
+from app.game_core import constants as c
+from app.game_core import get_move_tree
+from app.services.game_state import GameState, STATE_PLAYING
+from app.services.game_turn_manager import GameTurnManager
+
+CONFIG = {'ELO_REWARD_WIN': 1, 'MONEY_REWARD_WIN': 10, 'ELO_PENALTY_LOSS': -1}
+
+
+class _Players:
+    def get_player_context(self, sid):
+        return (c.PLAYER_WHITE, None) if sid == 'W' else None
+
+
+def _start_turn(state, dice):
+    tree = get_move_tree(state.board, dice, c.PLAYER_WHITE)
+    state.reset_turn(list(dice), tree.turns(), tree)
+
+
+def _manager():
+    return GameTurnManager('g', 'pvp', CONFIG, lambda *a, **k: None, None, None, None)
+
+
+def _playing_state(dice):
+    state = GameState()
+    state.session_state = STATE_PLAYING
+    state.turn = c.PLAYER_WHITE
+    _start_turn(state, dice)
+    return state
+
+
+def test_undo_restores_turns_from_stack():
+    manager, state = _manager(), _playing_state([6, 5])
+    turns_before = state.possible_turns
+
+    manager.apply_player_step(state, _Players(), 'W', {'from': 24, 'to': 18})
+    assert len(state.turns_stack) == len(state.history) == 1
+
+    notifications = manager.undo_last_move(state, _Players(), 'W')
+    assert notifications[0]['event'] == 'undo_accepted'
+    assert state.possible_turns is turns_before
+    assert state.turns_stack == [] and state.history == []
+
+
+def test_reset_turn_drops_stack_with_history():
+    manager, state = _manager(), _playing_state([6, 5])
+    manager.apply_player_step(state, _Players(), 'W', {'from': 24, 'to': 18})
+
+    # Новый ход (например, бросок в другом менеджере) очищает все вместе
+    _start_turn(state, [3, 1])
+    assert state.history == [] and state.turns_stack == []
+
+    manager.apply_player_step(state, _Players(), 'W', {'from': 8, 'to': 5})
+    manager.undo_last_move(state, _Players(), 'W')
+    assert state.possible_turns == get_move_tree(state.board, [3, 1], c.PLAYER_WHITE).turns()
+    assert sorted(state.dice, reverse=True) == [3, 1]